@@ -0,0 +1,133 @@
+"""
+Synthetic package sources for the benchmarks: bare git repositories built with
+git fast-import and a local HTTP stand-in for the GitHub tags API.
+"""
+
+import hashlib
+import json
+import subprocess
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from urllib.parse import urlparse, parse_qs
+
+
+def make_bare_repo(path: Path, name: str, tags: int, files: int, file_size: int):
+  """Creates a bare repo with `tags` tagged commits (1.0.0, 1.1.0, ...) of a header-only library."""
+  path.mkdir(parents=True, exist_ok=True)
+  subprocess.run(["git", "init", "--quiet", "--bare", str(path)], check=True)
+  # Lets partial clones (--filter=blob:none) work against file:// remotes as they do against GitHub
+  subprocess.run(["git", "config", "uploadpack.allowFilter", "true"], cwd=path, check=True)
+
+  blob = ("// " + "x" * 76 + "\n") * max(1, file_size // 80)
+  stream = []
+  mark = 0
+  for minor in range(tags):
+    mark += 1
+    stream.append("commit refs/heads/main")
+    stream.append(f"mark :{mark}")
+    stream.append(f"committer bench <bench@example.com> {1700000000 + minor} +0000")
+    message = f"release 1.{minor}.0"
+    stream.append(f"data {len(message)}")
+    stream.append(message)
+    if minor:
+      stream.append(f"from :{mark - 1}")
+
+    for i in range(files if minor == 0 else 1):
+      content = f"#pragma once\n// {name} 1.{minor}.0\n{blob}"
+      stream.append(f"M 100644 inline include/{name}/header_{i}.hpp")
+      stream.append(f"data {len(content.encode())}")
+      stream.append(content)
+
+    stream.append(f"reset refs/tags/1.{minor}.0")
+    stream.append(f"from :{mark}")
+    stream.append("")
+
+  subprocess.run(
+    ["git", "fast-import", "--quiet"],
+    input="\n".join(stream).encode(), cwd=path, check=True
+  )
+
+
+def list_tags(repo: Path) -> list[dict]:
+  result = subprocess.run(
+    ["git", "for-each-ref", "--format=%(refname:short) %(objectname)", "refs/tags"],
+    cwd=repo, capture_output=True, text=True, check=True
+  )
+  tags = []
+  for line in result.stdout.splitlines():
+    name, sha = line.split()
+    tags.append({"name": name, "commit": {"sha": sha}})
+  return tags
+
+
+class FakeGitHub:
+  """Serves GET /repos/<owner>/<repo>/tags with pagination and ETags from local bare repos."""
+
+  def __init__(self, root: Path):
+    self.root = root
+    self.requests = 0
+    self.not_modified = 0
+    self.tag_cache: dict[str, list[dict]] = {}
+    self.server = ThreadingHTTPServer(("127.0.0.1", 0), self.handler())
+    self.thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+
+  @property
+  def url(self) -> str:
+    host, port = self.server.server_address
+    return f"http://{host}:{port}"
+
+  def handler(self):
+    fake = self
+
+    class Handler(BaseHTTPRequestHandler):
+      def log_message(self, *args):
+        pass
+
+      def do_GET(self):
+        fake.requests += 1
+        parsed = urlparse(self.path)
+        parts = parsed.path.strip("/").split("/")
+        if len(parts) != 4 or parts[0] != "repos" or parts[3] != "tags":
+          self.send_error(404)
+          return
+
+        slug = f"{parts[1]}/{parts[2]}"
+        repo = fake.root / f"{slug}.git"
+        if not repo.exists():
+          self.send_error(404)
+          return
+
+        if slug not in fake.tag_cache:
+          fake.tag_cache[slug] = list_tags(repo)
+        tags = fake.tag_cache[slug]
+
+        query = parse_qs(parsed.query)
+        per_page = int(query.get("per_page", ["30"])[0])
+        page = int(query.get("page", ["1"])[0])
+        body = json.dumps(tags[(page - 1) * per_page:page * per_page]).encode()
+        etag = '"' + hashlib.sha1(json.dumps(tags).encode()).hexdigest() + '"'
+
+        if page == 1 and self.headers.get("If-None-Match") == etag:
+          fake.not_modified += 1
+          self.send_response(304)
+          self.send_header("ETag", etag)
+          self.end_headers()
+          return
+
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.send_header("ETag", etag)
+        self.end_headers()
+        self.wfile.write(body)
+
+    return Handler
+
+  def __enter__(self):
+    self.thread.start()
+    return self
+
+  def __exit__(self, *exc):
+    self.server.shutdown()
+    self.server.server_close()
@@ -0,0 +1,286 @@
+"""
+Times cget's install, update, tag resolution and CMake generation against local
+sources, cold (empty caches) and warm, and writes the results as JSON.
+
+  python benchmarks/run.py --deps 1,10,100 --output results.json
+  python benchmarks/run.py --compare results.json
+"""
+
+import argparse
+import contextlib
+import io
+import json
+import os
+import platform
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+from fixtures import FakeGitHub, make_bare_repo  # noqa: E402
+
+from cget.utils import misc  # noqa: E402
+from cget.utils.install import install_all  # noqa: E402
+from cget.utils.misc import project_transaction  # noqa: E402
+from cget.utils.generate_build_cmake import generate_build_cmake  # noqa: E402
+from cget.commands.update import update_command  # noqa: E402
+
+
+# Commands that must start without the dependency resolver, HTTP client or archive support
+LIGHT_COMMANDS = [["list"], ["--help"]]
+HEAVY_MODULES = ["packaging", "requests", "tarfile"]
+IMPORT_PROBE = """
+import sys
+from cget.cli import cli
+try:
+  cli(sys.argv[2:])
+except SystemExit:
+  pass
+print(" ".join(m for m in sys.argv[1].split(",") if m in sys.modules), file=sys.stderr)
+"""
+
+
+@contextlib.contextmanager
+def silenced():
+  """Hides cget's output, including git subprocesses writing to the inherited fds."""
+  sys.stdout.flush()
+  saved = [os.dup(1), os.dup(2)]
+  devnull = os.open(os.devnull, os.O_WRONLY)
+  try:
+    os.dup2(devnull, 1)
+    os.dup2(devnull, 2)
+    with contextlib.redirect_stdout(io.StringIO()):
+      yield
+  finally:
+    os.dup2(saved[0], 1)
+    os.dup2(saved[1], 2)
+    for fd in saved + [devnull]:
+      os.close(fd)
+
+
+@contextlib.contextmanager
+def chdir(path: Path):
+  previous = os.getcwd()
+  os.chdir(path)
+  try:
+    yield
+  finally:
+    os.chdir(previous)
+
+
+def timed(func) -> float:
+  start = time.perf_counter()
+  with silenced():
+    func()
+  return time.perf_counter() - start
+
+
+class Bench:
+  def __init__(self, args, workdir: Path, fake: FakeGitHub):
+    self.args = args
+    self.workdir = workdir
+    self.fake = fake
+    self.results = []
+
+  def record(self, benchmark: str, deps: int, state: str, seconds: float, **extra):
+    self.results.append({"benchmark": benchmark, "deps": deps, "state": state, "seconds": round(seconds, 6), **extra})
+    print(f"{benchmark:<22} {deps:>4} deps  {state:<6} {seconds * 1000:10.1f} ms")
+
+  def fresh_cache(self, label: str) -> Path:
+    cache = self.workdir / "cache" / label
+    shutil.rmtree(cache, ignore_errors=True)
+    os.environ["CGET_CACHE_DIR"] = str(cache)
+    misc._version_indexes.clear()
+    return cache
+
+  def project(self, label: str, count: int) -> tuple[Path, dict]:
+    path = self.workdir / "projects" / label
+    shutil.rmtree(path, ignore_errors=True)
+    (path / "extern").mkdir(parents=True)
+    fetch = {"fetch": self.args.fetch} if self.args.fetch else {}
+    data = {
+      "name": label,
+      "version": "0.1.0",
+      "dependencies": [
+        {"name": f"pkg{i}", "source": f"bench/pkg{i}", "version": "latest", "platforms": None, **fetch}
+        for i in range(count)
+      ],
+      "devDependencies": [],
+      "compilerOptions": {}
+    }
+    (path / "cget.json").write_text(json.dumps(data, indent=2))
+    return path, data
+
+  def find_best_tag(self, count: int):
+    sources = [f"bench/pkg{i}" for i in range(count)]
+    self.fresh_cache(f"tags-{count}")
+
+    def run():
+      for source in sources:
+        misc.find_best_tag(source, "latest")
+
+    requests = self.fake.requests
+    self.record("find_best_tag", count, "cold", timed(run), http_requests=self.fake.requests - requests)
+
+    # Drop the in-process index so the warm run measures the on-disk tag cache
+    misc._version_indexes.clear()
+    requests = self.fake.requests
+    self.record("find_best_tag", count, "warm", timed(run), http_requests=self.fake.requests - requests)
+
+  def install_all(self, count: int):
+    self.fresh_cache(f"install-{count}")
+    path, data = self.project(f"install-{count}", count)
+
+    def install():
+      with project_transaction() as transaction:
+        _, success = install_all(transaction, False, self.args.jobs)
+      if not success:
+        raise RuntimeError("install_all failed, the timing would be meaningless")
+
+    with chdir(path):
+      self.record("install_all", count, "cold", timed(install))
+      self.record("install_all", count, "warm", timed(install))
+
+      # A second project on the same machine: the package store is warm, the project is empty
+      shutil.rmtree(path / ".cget_packages")
+      shutil.rmtree(path / "extern")
+      (path / "extern").mkdir()
+      self.record("install_all", count, "store", timed(install))
+
+      self.record("generate_build_cmake", count, "cold", timed(
+        lambda: generate_build_cmake(data["dependencies"], path / "_dependencies.cmake", {})
+      ))
+      self.record("generate_build_cmake", count, "warm", timed(
+        lambda: generate_build_cmake(data["dependencies"], path / "_dependencies.cmake", {})
+      ))
+
+  def update(self, count: int):
+    self.fresh_cache(f"update-{count}")
+    path, _ = self.project(f"update-{count}", count)
+
+    with chdir(path):
+      self.record("update_command", count, "cold", timed(lambda: update_command.callback(jobs=self.args.jobs, dry_run=False)))
+      misc._version_indexes.clear()
+      self.record("update_command", count, "warm", timed(lambda: update_command.callback(jobs=self.args.jobs, dry_run=False)))
+
+  def startup(self):
+    path, _ = self.project("startup", 1)
+    cmd = [sys.executable, "-c", "from cget.cli import cli; cli()", "list"]
+    env = dict(os.environ, PYTHONPATH=str(ROOT))
+
+    samples = []
+    for _ in range(5):
+      start = time.perf_counter()
+      subprocess.run(cmd, cwd=path, env=env, capture_output=True, check=True)
+      samples.append(time.perf_counter() - start)
+
+    self.record("cli_startup", 0, "warm", min(samples))
+
+    problems = []
+    for args in LIGHT_COMMANDS:
+      probe = [sys.executable, "-c", IMPORT_PROBE, ",".join(HEAVY_MODULES), *args]
+      result = subprocess.run(probe, cwd=path, env=env, capture_output=True, text=True, check=True)
+      imported = result.stderr.strip().splitlines()[-1:] or [""]
+      if imported[0]:
+        problems.append(f"`cget {' '.join(args)}` imports {imported[0]}")
+    return min(samples), problems
+
+
+def git_commit() -> str | None:
+  result = subprocess.run(["git", "rev-parse", "HEAD"], cwd=ROOT, capture_output=True, text=True)
+  return result.stdout.strip() or None
+
+
+def compare(baseline_path: Path, results: list[dict]):
+  baseline = {
+    (r["benchmark"], r["deps"], r["state"]): r["seconds"]
+    for r in json.loads(baseline_path.read_text())["results"]
+  }
+
+  print(f"\n{'benchmark':<22} {'deps':>4}  {'state':<6} {'before':>10} {'after':>10} {'change':>8}")
+  for result in results:
+    key = (result["benchmark"], result["deps"], result["state"])
+    if key not in baseline:
+      continue
+    before, after = baseline[key], result["seconds"]
+    change = f"{after / before:.2f}x" if before else "n/a"
+    print(f"{key[0]:<22} {key[1]:>4}  {key[2]:<6} {before * 1000:9.1f}ms {after * 1000:9.1f}ms {change:>8}")
+
+
+def main():
+  parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+  parser.add_argument("--deps", default="1,10,100", help="Comma-separated dependency counts")
+  parser.add_argument("--tags", type=int, default=50, help="Tags per synthetic repository")
+  parser.add_argument("--files", type=int, default=20, help="Headers per synthetic repository")
+  parser.add_argument("--file-size", type=int, default=4096, help="Bytes per header")
+  parser.add_argument("--backend", default="git", choices=["git", "github"], help="Tag source backend")
+  parser.add_argument("--fetch", default=None, choices=["full", "headers"], help="Per-dependency fetch setting")
+  parser.add_argument("--jobs", type=int, default=misc.get_cpu_count(), help="Parallel installs")
+  parser.add_argument("--only", default=None, help="Comma-separated subset: tags,install,update,startup")
+  parser.add_argument("--output", type=Path, default=None, help="Write JSON results here")
+  parser.add_argument("--compare", type=Path, default=None, help="Baseline JSON to compare against")
+  parser.add_argument("--startup-budget", type=float, default=0.5, help="Fail if `cget list` takes longer (seconds)")
+  args = parser.parse_args()
+
+  counts = [int(c) for c in args.deps.split(",")]
+  only = set(args.only.split(",")) if args.only else {"tags", "install", "update", "startup"}
+
+  with tempfile.TemporaryDirectory(prefix="cget-bench-") as tmp:
+    workdir = Path(tmp)
+    remotes = workdir / "remotes"
+    for i in range(max(counts)):
+      make_bare_repo(remotes / "bench" / f"pkg{i}.git", f"pkg{i}", args.tags, args.files, args.file_size)
+
+    os.environ["CGET_GIT_BASE"] = remotes.as_uri()
+    os.environ["CGET_SOURCE_BACKEND"] = args.backend
+
+    with FakeGitHub(remotes) as fake:
+      os.environ["CGET_GITHUB_API"] = fake.url
+      bench = Bench(args, workdir, fake)
+
+      for count in counts:
+        if "tags" in only:
+          bench.find_best_tag(count)
+        if "install" in only:
+          bench.install_all(count)
+        if "update" in only:
+          bench.update(count)
+
+      startup, import_problems = bench.startup() if "startup" in only else (None, [])
+
+  output = {
+    "meta": {
+      "commit": git_commit(),
+      "python": platform.python_version(),
+      "platform": platform.platform(),
+      "cpus": misc.get_cpu_count(),
+      "params": {k: str(v) if isinstance(v, Path) else v for k, v in vars(args).items()}
+    },
+    "results": bench.results
+  }
+
+  if args.output:
+    args.output.write_text(json.dumps(output, indent=2))
+    print(f"\nResults written to {args.output}")
+
+  if args.compare:
+    compare(args.compare, bench.results)
+
+  failed = False
+  for problem in import_problems:
+    print(f"\n{problem}, which startup must not load")
+    failed = True
+  if startup is not None and startup > args.startup_budget:
+    print(f"\n`cget list` took {startup:.3f}s, over the {args.startup_budget:.3f}s budget")
+    failed = True
+  if failed:
+    sys.exit(1)
+
+
+if __name__ == "__main__":
+  main()
@@ -19,22 +19,84 @@
 
 
 import click
-from cget.commands.init import init_command
-from cget.commands.install import install_command
-from cget.commands.build import build_command
-from cget.commands.uninstall import uninstall_command
-from cget.commands.list import list_command
-from cget.commands.update import update_command
+import importlib
+import os
+from cget.utils import trace
 
 
-@click.group()
-def cli():
+def short_help(text: str, limit: int) -> str:
+  """Cuts a help line the way click does: after a sentence's full stop, or at a word with "..." to fit limit."""
+  words = text.split()
+  length = 0
+  for i, word in enumerate(words):
+    length += len(word) + (i > 0)
+    if length > limit:
+      break
+    if word.endswith("."):
+      return " ".join(words[:i + 1])
+  else:
+    return " ".join(words)
+
+  while i > 0 and len(" ".join(words[:i])) + 3 > limit:
+    i -= 1
+  return " ".join(words[:i]) + "..."
+
+
+class LazyGroup(click.Group):
+  """
+  A click group that imports a command's module only when that command is used. Each lazy command
+  is "name": ("module:attribute", "help line"), so `cget --help` can list it without the import.
+  """
+
+  def __init__(self, *args, lazy_commands: dict[str, tuple[str, str]] | None = None, **kwargs):
+    super().__init__(*args, **kwargs)
+    self.lazy_commands = lazy_commands or {}
+
+  def list_commands(self, ctx):
+    return sorted(set(super().list_commands(ctx)) | set(self.lazy_commands))
+
+  def get_command(self, ctx, name):
+    if name not in self.commands and name in self.lazy_commands:
+      module, attr = self.lazy_commands[name][0].split(":")
+      self.add_command(getattr(importlib.import_module(module), attr), name)
+    return super().get_command(ctx, name)
+
+  def format_commands(self, ctx, formatter):
+    names = self.list_commands(ctx)
+    if not names:
+      return
+
+    limit = formatter.width - 6 - max(len(name) for name in names)
+    rows = []
+    for name in names:
+      if name in self.commands:
+        if not self.commands[name].hidden:
+          rows.append((name, self.commands[name].get_short_help_str(limit)))
+      else:
+        rows.append((name, short_help(self.lazy_commands[name][1], limit)))
+
+    with formatter.section("Commands"):
+      formatter.write_dl(rows)
+
+
+@click.group(cls=LazyGroup, lazy_commands={
+  "init": ("cget.commands.init:init_command", "Initialize a new cget.json"),
+  "install": ("cget.commands.install:install_command", "Add a dependency by user/repo format, e.g. fmtlib/fmt"),
+  "build": ("cget.commands.build:build_command", "Install all dependencies and build project"),
+  "uninstall": ("cget.commands.uninstall:uninstall_command", "Uninstall a dependency by source"),
+  "list": ("cget.commands.list:list_command", "List all installed dependencies"),
+  "update": ("cget.commands.update:update_command", "Update all dependencies to latest compatible versions and update lock file"),
+  "cache": ("cget.commands.cache:cache_command", "Manage the global package store shared by all projects"),
+  "gc": ("cget.commands.gc:gc_command", "Remove installed package versions and extern/ links that cget.lock.json no longer pins"),
+  "du": ("cget.commands.du:du_command", "Show the disk usage of every installed package"),
+  "pack": ("cget.commands.pack:pack_command", "Bundle every locked dependency into one archive for offline installs (use - for stdout)"),
+  "unpack": ("cget.commands.unpack:unpack_command", "Restore dependencies from a `cget pack` bundle without network access (use - for stdin)"),
+  "verify": ("cget.commands.verify:verify_command", "Check installed packages against the content hashes in cget.lock.json"),
+})
+@click.option("--timings", is_flag=True, default=False, help="Print a per-phase timing summary (set CGET_TRACE=path.json for a Chrome trace)")
+@click.pass_context
+def cli(ctx, timings: bool):
   """C++ Package Manager based on CPM.cmake"""
-  pass
-
-cli.add_command(init_command)
-cli.add_command(install_command)
-cli.add_command(build_command)
-cli.add_command(uninstall_command)
-cli.add_command(list_command)
-cli.add_command(update_command)
\ No newline at end of file
+  if timings or os.environ.get("CGET_TRACE"):
+    trace.enable()
+    ctx.call_on_close(lambda: trace.finish(timings))
@@ -21,12 +21,272 @@
 import click
 import os
 import json
+import shlex
+import shutil
 import subprocess
-import platform
-import urllib.request
+import time
 from pathlib import Path
-from cget.utils.misc import load_lock
+from cget.utils.misc import get_cpu_count, run_parallel
 from cget.utils.generate_build_cmake import generate_build_cmake
+from cget.utils.compiler_cache import COMPILER_CACHES, detect_compiler_cache, read_stats, report_stats
+from cget.utils.build import compute_fingerprint, is_configured, save_fingerprint, select_generator, parse_matrix, split_jobs
+from cget.utils.pch import analyze_includes
+from cget.utils.trace import span
+from cget.utils.watch import create_watcher, wait_for_changes, needs_configure
+from cget.utils.workspace import WORKSPACE_FILE, open_workspace, generate_superbuild
+
+
+WATCH_DIRS = ["src", "include", "apps", "tests", "cmake"]
+WATCH_FILES = ["cget.json", "cget.lock.json", "CMakeLists.txt"]
+CONFIGURE_FILES = {"cget.json", "cget.lock.json", "CMakeLists.txt", WORKSPACE_FILE}
+WATCH_DEBOUNCE = 0.3
+MATRIX_LOG = "cget-build.log"
+MATRIX_LOG_TAIL = 20
+
+
+def load_build_manifest(project_root: Path) -> tuple[dict, list[Path]]:
+  """
+  cget.json and the project root, or for a workspace the merged manifest of its members and their
+  directories (regenerating the superbuild).
+  """
+  workspace = open_workspace(project_root)
+  if workspace:
+    members, data = workspace
+    generate_superbuild(project_root, data["name"], members)
+    return data, [member for member, _ in members]
+
+  with open(project_root / "cget.json", "r") as f:
+    return json.load(f), [project_root]
+
+
+def report_pch(analysis: dict):
+  headers = analysis["headers"]
+  if not headers:
+    click.echo(f"No header is shared by enough of the {analysis['units']} translation units to precompile.")
+    return
+
+  click.echo(f"Precompiled headers (from {analysis['units']} translation units):")
+  for entry in headers:
+    click.echo(f"  <{entry['header']}>".ljust(36) + f" used by {entry['uses']:>4}, ~{entry['parse_ms']:.0f} ms each")
+  saved = sum(entry["saved_ms"] for entry in headers) / 1000
+  click.echo(f"Estimated parse time saved per full build: ~{saved:.1f}s (rough, from header sizes)")
+
+
+def report(message: str, log=None):
+  """Echoes a progress message, or writes it to the build log of a matrix variant."""
+  if log is None:
+    click.echo(message)
+  else:
+    log.write(message + "\n")
+    log.flush()
+
+
+def run_logged(cmd: list[str], log=None, cwd: Path | None = None) -> subprocess.CompletedProcess:
+  return subprocess.run(cmd, cwd=cwd, stdout=log, stderr=subprocess.STDOUT if log else None)
+
+
+def prepare_dependencies(project_root: Path, dev: bool, cache: str | None, prebuilt: bool | None, pch: bool | None = None) -> tuple[dict, dict | None] | None:
+  """Generates _dependencies.cmake. Returns (manifest, compiler cache), or None if the manifest is invalid."""
+  try:
+    data, roots = load_build_manifest(project_root)
+  except ValueError as e:
+    click.echo(f"Error: {e}")
+    return None
+
+  dependencies = data.get("dependencies", [])
+  if dev:
+    dependencies += data.get("devDependencies", [])
+    
+  compiler_options = data.get("compilerOptions", {})
+  
+  compiler_cache = detect_compiler_cache(cache or data.get("compilerCache"))
+  if compiler_cache:
+    click.echo(f"Using {compiler_cache['tool']} ({compiler_cache['dir']})")
+
+  if prebuilt is None:
+    prebuilt = bool(data.get("prebuiltCache", False))
+
+  if pch is None:
+    pch = bool(data.get("precompiledHeaders", False))
+  precompiled_headers = None
+  if pch:
+    with span("analyze_includes"):
+      analysis = analyze_includes(project_root, roots)
+    report_pch(analysis)
+    precompiled_headers = analysis["headers"]
+
+  generate_build_cmake(
+    dependencies, project_root / "_dependencies.cmake", compiler_options, compiler_cache, prebuilt,
+    precompiled_headers, bool(data.get("unityBuild", False)), data.get("unityBuildBatchSize")
+  )
+  return data, compiler_cache
+
+
+def configure_build_dir(project_root: Path, build_dir: Path, data: dict, generator: str | None, verbose: bool, build_type: str | None, force: bool = False, log=None) -> bool:
+  """Runs CMake for one build directory if anything that feeds the configure step changed."""
+  build_dir.mkdir(parents=True, exist_ok=True)
+  generator = select_generator(build_dir, generator)
+
+  cmd = ["cmake", "-S", str(project_root), "-B", str(build_dir)]
+  if verbose:
+      cmd.append("--verbose")
+  if generator:
+    cmd.append("-G")
+    cmd.append(f"{generator}")
+  if build_type:
+    cmd.append(f"-DCMAKE_BUILD_TYPE={build_type}")
+
+  fingerprint = compute_fingerprint(project_root, data, cmd)
+  if not force and is_configured(build_dir, fingerprint):
+    report("CMake configuration is up to date.", log)
+    return True
+
+  report("Running CMake configuration...", log)
+  save_fingerprint(build_dir, None)
+  with span("cmake_configure", category="subprocess", build_dir=str(build_dir)):
+    result = run_logged(cmd, log)
+  if result.returncode != 0:
+    report("CMake configuration failed.", log)
+    return False
+  save_fingerprint(build_dir, fingerprint)
+  return True
+
+
+def configure_project(project_root: Path, build_dir: Path, dev: bool, generator: str | None, verbose: bool, cache: str | None, prebuilt: bool | None, force: bool = False, pch: bool | None = None) -> tuple[bool, dict | None]:
+  """Generates _dependencies.cmake and runs CMake if its inputs changed. Returns (success, compiler cache)."""
+  prepared = prepare_dependencies(project_root, dev, cache, prebuilt, pch)
+  if prepared is None:
+    return False, None
+
+  data, compiler_cache = prepared
+  return configure_build_dir(project_root, build_dir, data, generator, verbose, "Debug" if dev else None, force), compiler_cache
+
+
+def compile_project(build_dir: Path, jobs: int | None, target: str | None, compiler_cache: dict | None, cache_stats: bool, config: str | None = None, log=None) -> bool:
+  stats_before = read_stats(compiler_cache) if compiler_cache and cache_stats else None
+
+  report("Building project...", log)
+  cmd = ["cmake", "--build", ".", "--parallel", str(jobs or get_cpu_count())]
+  if config:
+    # Selects the configuration of multi-config generators, single-config ones ignore it
+    cmd += ["--config", config]
+  if target:
+    cmd += ["--target", target]
+  with span("cmake_build", category="subprocess", build_dir=str(build_dir)):
+    result = run_logged(cmd, log, build_dir)
+  if result.returncode != 0:
+    report("Build failed.", log)
+    return False
+
+  if compiler_cache and cache_stats:
+    report_stats(compiler_cache, stats_before, read_stats(compiler_cache))
+  elif cache_stats:
+    click.echo("No compiler cache in use.")
+
+  report("Build complete.", log)
+  return True
+
+
+def run_tests(build_dir: Path, jobs: int | None, config: str | None = None, log=None) -> bool:
+  report("Running tests...", log)
+  cmd = ["ctest", "--output-on-failure", "--parallel", str(jobs or get_cpu_count())]
+  if config:
+    cmd += ["-C", config]
+  with span("ctest", category="subprocess", build_dir=str(build_dir)):
+    result = run_logged(cmd, log, build_dir)
+  if result.returncode != 0:
+    report("Tests failed.", log)
+    return False
+  return True
+
+
+def run_after_build(build_dir: Path, run: str | None, test: bool, jobs: int | None) -> bool:
+  """Runs the --test and --run steps of a successful build. Returns False if one of them failed."""
+  if test and not run_tests(build_dir, jobs):
+    return False
+
+  if run:
+    click.echo(f"Running {run}...")
+    with span("run", category="subprocess"):
+      result = subprocess.run(shlex.split(run, posix=os.name != "nt"))
+    if result.returncode != 0:
+      click.echo(f"{run} exited with status {result.returncode}.")
+      return False
+
+  return True
+
+
+def build_matrix(project_root: Path, build_dir: Path, variants: list[dict], data: dict, verbose: bool, jobs: int | None, target: str | None, compiler_cache: dict | None, test: bool) -> list[dict]:
+  """
+  Configures and builds every variant in build_dir/<variant> at the same time, splitting the compile
+  jobs between them. Each variant's CMake output goes to its own cget-build.log.
+  """
+  shares = split_jobs(jobs or get_cpu_count(), len(variants))
+
+  def build_variant(item: tuple[dict, int]) -> dict:
+    variant, share = item
+    variant_dir = build_dir / variant["name"]
+    variant_dir.mkdir(parents=True, exist_ok=True)
+    log_path = variant_dir / MATRIX_LOG
+    start = time.perf_counter()
+
+    with span("build_variant", variant=variant["name"]), open(log_path, "w") as log:
+      if not configure_build_dir(project_root, variant_dir, data, variant["generator"], verbose, variant["build_type"], log=log):
+        status = "configure failed"
+      elif not compile_project(variant_dir, share, target, compiler_cache, False, variant["build_type"], log):
+        status = "build failed"
+      elif test and not run_tests(variant_dir, share, variant["build_type"], log):
+        status = "tests failed"
+      else:
+        status = "ok"
+
+    elapsed = time.perf_counter() - start
+    click.echo(f"[{variant['name']}] {status} ({elapsed:.1f}s)")
+    return {**variant, "dir": variant_dir, "log": log_path, "status": status, "elapsed": elapsed}
+
+  click.echo(f"Building {len(variants)} variants ({', '.join(variant['name'] for variant in variants)}) with {'/'.join(map(str, shares))} jobs...")
+  return run_parallel(build_variant, list(zip(variants, shares)), len(variants))
+
+
+def report_matrix(results: list[dict]) -> bool:
+  """Prints the combined summary and the log tail of every failed variant. Returns True if all passed."""
+  for result in results:
+    if result["status"] != "ok":
+      click.echo(f"\n--- {result['name']}: last lines of {result['log']} ---")
+      lines = result["log"].read_text(errors="replace").splitlines()
+      click.echo("\n".join(lines[-MATRIX_LOG_TAIL:]))
+
+  click.echo("\nBuild matrix:")
+  for result in results:
+    click.echo(f"  {result['name']:<24} {result['status']:<17} {result['elapsed']:>7.1f}s  {result['dir']}")
+
+  failed = [result for result in results if result["status"] != "ok"]
+  click.echo(f"{len(results) - len(failed)} of {len(results)} variants passed.")
+  return not failed
+
+
+def watch_project(project_root: Path, polling: bool, configure, build, dirs: list[str], files: list[str]):
+  """Rebuilds on every burst of changes: build-only for source edits, reconfigure for CMake or manifest changes."""
+  watcher = create_watcher(project_root, dirs, files, polling)
+  click.echo(f"\nWatching {', '.join(dirs + files)} for changes (Ctrl+C to stop)...")
+
+  try:
+    while True:
+      changes = wait_for_changes(watcher, WATCH_DEBOUNCE)
+      if not changes:
+        continue
+
+      names = ", ".join(path.relative_to(project_root).as_posix() for path, _ in changes[:3])
+      more = f" and {len(changes) - 3} more" if len(changes) > 3 else ""
+      click.echo(f"\nChanged: {names}{more}")
+
+      if needs_configure(changes, CONFIGURE_FILES) and not configure():
+        continue
+      build()
+  except KeyboardInterrupt:
+    click.echo("\nStopped watching.")
+  finally:
+    watcher.close()
 
 
 @click.command("build")
@@ -34,17 +294,35 @@ from cget.utils.generate_build_cmake import generate_build_cmake
 @click.option("--generator", default=None, help="CMake generator to use.")
 @click.option("--build-dir", default="./build", help="Build path")
 @click.option("--verbose", is_flag=True, default=False, help="Verbose output")
-def build_command(dev: bool, generator: str, build_dir, verbose):
+@click.option("--jobs", "-j", type=int, default=None, help="Parallel compile jobs (defaults to available CPUs)")
+@click.option("--target", default=None, help="Build only this target")
+@click.option("--cache", type=click.Choice(COMPILER_CACHES), is_flag=False, flag_value="auto", default=None, help="Compiler cache to use (overrides compilerCache in cget.json)")
+@click.option("--prebuilt/--no-prebuilt", default=None, help="Reuse dependencies built once per toolchain from the shared prebuilt cache (overrides prebuiltCache in cget.json)")
+@click.option("--cache-stats", is_flag=True, default=False, help="Print compiler cache hit/miss ratio after the build")
+@click.option("--watch", is_flag=True, default=False, help="Rebuild whenever sources, CMake files or cget.json change")
+@click.option("--poll", is_flag=True, default=False, help="Watch by polling instead of inotify (e.g. on network filesystems)")
+@click.option("--run", default=None, help="Command to run after each successful build, e.g. ./build/apps/app")
+@click.option("--test", is_flag=True, default=False, help="Run ctest after each successful build")
+@click.option("--matrix", is_flag=False, flag_value="", default=None, help="Build several configurations concurrently, e.g. Debug,Release,Release:Ninja (alone: buildMatrix from cget.json)")
+@click.option("--pch/--no-pch", default=None, help="Precompile the standard and dependency headers most sources include (overrides precompiledHeaders in cget.json)")
+def build_command(dev: bool, generator: str, build_dir, verbose, jobs: int, target: str, cache: str, prebuilt: bool, cache_stats: bool, watch: bool, poll: bool, run: str, test: bool, matrix: str, pch: bool):
   """Install all dependencies and build project"""
   
   project_root = Path(".")
   cget_path = project_root / "cget.json"
   cpm_path = project_root / "cmake" / "CPM.cmake"
   cmake_path = project_root / "CMakeLists.txt"
-  dependencies_path = project_root / "_dependencies.cmake"
   build_dir = Path(build_dir)
 
-  if not cget_path.exists():
+  try:
+    workspace = open_workspace(project_root)
+  except ValueError as e:
+    raise click.ClickException(str(e))
+
+  if workspace:
+    members, data = workspace
+    generate_superbuild(project_root, data["name"], members)
+  elif not cget_path.exists():
     click.echo("Error: cget.json not found.")
     return
   
@@ -53,45 +331,60 @@ def build_command(dev: bool, generator: str, build_dir, verbose):
     return
   
   if not cpm_path.exists():
+    import urllib.request
+
     click.echo("Downloading CPM.cmake...")
     os.makedirs(project_root / "cmake", exist_ok=True)
     url = "https://github.com/cpm-cmake/CPM.cmake/releases/latest/download/CPM.cmake"
     urllib.request.urlretrieve(url, cpm_path)
     click.echo("CPM.cmake downloaded")
 
-  with open(cget_path, "r") as f:
-    data = json.load(f)
+  if workspace:
+    # Member CMakeLists include cmake/CPM.cmake relative to themselves
+    for member, _ in members:
+      if not (member / "cmake" / "CPM.cmake").exists():
+        (member / "cmake").mkdir(exist_ok=True)
+        shutil.copyfile(cpm_path, member / "cmake" / "CPM.cmake")
 
-  dependencies = data.get("dependencies", [])
-  if dev:
-    dependencies += data.get("devDependencies", [])
-    
-  compiler_options = data.get("compilerOptions", {})
-  
-  generate_build_cmake(dependencies, dependencies_path, compiler_options)
-  
-  build_dir.mkdir(exist_ok=True)
+  if matrix is not None:
+    if watch or run:
+      raise click.UsageError("--matrix cannot be combined with --watch or --run.")
 
-  click.echo("Running CMake configuration...")
-  cmd = ["cmake", ".."]
-  if verbose:
-      cmd.append("--verbose")
-  if generator:
-    cmd.append("-G")
-    cmd.append(f"{generator}")
-  if dev:
-    cmd.append("-DCMAKE_BUILD_TYPE=Debug")
-  result = subprocess.run(cmd, cwd=build_dir)
-  if result.returncode != 0:
-    click.echo("CMake configuration failed.")
-    return
-  
-  click.echo("Building project...")
-  result = subprocess.run(["cmake", "--build", "."], cwd=build_dir)
-  if result.returncode != 0:
-    click.echo("Build failed.")
+    prepared = prepare_dependencies(project_root, dev, cache, prebuilt, pch)
+    if prepared is None:
+      return
+    data, compiler_cache = prepared
+
+    try:
+      variants = parse_matrix(matrix.split(",") if matrix else data.get("buildMatrix"), generator)
+    except ValueError as e:
+      raise click.UsageError(str(e))
+
+    stats_before = read_stats(compiler_cache) if compiler_cache and cache_stats else None
+    results = build_matrix(project_root, build_dir, variants, data, verbose, jobs, target, compiler_cache, test)
+    if stats_before is not None:
+      report_stats(compiler_cache, stats_before, read_stats(compiler_cache))
+    if not report_matrix(results):
+      raise click.ClickException("Some build matrix variants failed.")
     return
-  
-  os.remove(dependencies_path)
 
-  click.echo("Build complete.")
\ No newline at end of file
+  state = {"compiler_cache": None}
+
+  def configure(force: bool = False) -> bool:
+    ok, state["compiler_cache"] = configure_project(project_root, build_dir, dev, generator, verbose, cache, prebuilt, force, pch)
+    return ok
+
+  def build() -> bool:
+    return compile_project(build_dir, jobs, target, state["compiler_cache"], cache_stats) and run_after_build(build_dir, run, test, jobs)
+
+  if configure():
+    build()
+
+  if watch:
+    # Added or removed sources only reach CMake's globs through a forced reconfigure
+    if workspace:
+      dirs = [member.relative_to(project_root).as_posix() for member, _ in members]
+      files = [WORKSPACE_FILE, "cget.lock.json", "CMakeLists.txt"]
+    else:
+      dirs, files = WATCH_DIRS, WATCH_FILES
+    watch_project(project_root, poll, lambda: configure(force=True), build, dirs, files)
@@ -0,0 +1,86 @@
+#    CGet - A lightweight package manager for C++ projects using CMake and CPM.
+#    Copyright (C) 2025  Mohamed Ibrahim
+#
+#    This program is free software: you can redistribute it and/or modify
+#    it under the terms of the GNU General Public License as published by
+#    the Free Software Foundation, either version 3 of the License, or
+#    (at your option) any later version.
+#
+#    This program is distributed in the hope that it will be useful,
+#    but WITHOUT ANY WARRANTY; without even the implied warranty of
+#    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#    GNU General Public License for more details.
+#
+#    You should have received a copy of the GNU General Public License
+#    along with this program.  If not, see <https://www.gnu.org/licenses/>.
+#
+#    For questions, feedback, or contributions, you can reach me at:
+#                   Email: m.ibrahim9276@gmail.com
+
+
+
+import click
+import time
+from pathlib import Path
+from cget.utils import store
+from cget.utils.prebuilt import get_prebuilt_dir, list_prebuilt, prune_prebuilt
+
+
+def format_size(size: float) -> str:
+  for unit in ["B", "KB", "MB", "GB"]:
+    if size < 1024:
+      return f"{size:.1f} {unit}"
+    size /= 1024
+  return f"{size:.1f} TB"
+
+
+@click.group("cache")
+def cache_command():
+  """Manage the global package store shared by all projects"""
+  pass
+
+
+@cache_command.command("list")
+def cache_list_command():
+  """List cached packages"""
+  entries = store.list_entries()
+  if not entries:
+    click.echo(f"Package store is empty ({store.get_store_dir()}).")
+    return
+
+  total = 0
+  click.echo(f"Package store: {store.get_store_dir()}")
+  for entry in entries:
+    size = store.dir_size(entry["path"])
+    total += size
+    versions = ", ".join(entry["versions"]) or "unreferenced"
+    last_used = time.strftime("%Y-%m-%d", time.localtime(entry["last_used"]))
+    click.echo(f" - {entry['source']} ({versions}) {entry['commit'][:12]}  {format_size(size)}, last used {last_used}")
+
+  click.echo(f"{len(entries)} packages, {format_size(total)} total.")
+
+  prebuilt = list_prebuilt()
+  if prebuilt:
+    size = sum(store.dir_size(entry["path"]) for entry in prebuilt)
+    click.echo(f"Prebuilt cache: {get_prebuilt_dir()}, {len(prebuilt)} builds, {format_size(size)}.")
+
+
+@cache_command.command("prune")
+@click.option("--older-than", default=30, type=int, help="Remove packages not used for this many days")
+@click.option("--all", "prune_all", is_flag=True, default=False, help="Remove every cached package")
+def cache_prune_command(older_than: int, prune_all: bool):
+  """
+  Remove cached packages that have not been used recently
+
+  Packages linked from the current project are kept. Other projects linking a removed package
+  get it back with `cget install`.
+  """
+  removed = store.prune(None if prune_all else older_than * 24 * 3600, store.linked_entries(Path(".cget_packages")))
+  for entry in removed:
+    click.echo(f"Removed {entry['source']} {entry['commit'][:12]}")
+
+  click.echo(f"Pruned {len(removed)} packages from the store.")
+
+  prebuilt = prune_prebuilt(None if prune_all else older_than * 24 * 3600)
+  if prebuilt:
+    click.echo(f"Pruned {len(prebuilt)} prebuilt dependency builds.")
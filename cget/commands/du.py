@@ -0,0 +1,45 @@
+#    CGet - A lightweight package manager for C++ projects using CMake and CPM.
+#    Copyright (C) 2025  Mohamed Ibrahim
+#
+#    This program is free software: you can redistribute it and/or modify
+#    it under the terms of the GNU General Public License as published by
+#    the Free Software Foundation, either version 3 of the License, or
+#    (at your option) any later version.
+#
+#    This program is distributed in the hope that it will be useful,
+#    but WITHOUT ANY WARRANTY; without even the implied warranty of
+#    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#    GNU General Public License for more details.
+#
+#    You should have received a copy of the GNU General Public License
+#    along with this program.  If not, see <https://www.gnu.org/licenses/>.
+#
+#    For questions, feedback, or contributions, you can reach me at:
+#                   Email: m.ibrahim9276@gmail.com
+
+
+import click
+from cget.commands.cache import format_size
+from cget.utils.gc import package_usage
+from cget.utils.misc import get_cpu_count, load_lock
+
+
+@click.command("du")
+@click.option("--jobs", "-j", type=int, default=None, help="Number of directories to size in parallel (defaults to CPU count)")
+def du_command(jobs: int):
+  """Show the disk usage of every installed package"""
+  usage = package_usage(load_lock(), jobs or get_cpu_count())
+  if not usage:
+    click.echo("No packages installed.")
+    return
+
+  for entry in sorted(usage, key=lambda entry: entry["size"], reverse=True):
+    notes = ["store" if entry["linked"] else "copy"]
+    if not entry["locked"]:
+      notes.append("unreferenced, `cget gc` removes it")
+    click.echo(f"  {format_size(entry['size']):>10}  {entry['package']}  ({', '.join(notes)})")
+
+  # Versions can share one store entry, count it once
+  total = sum({entry["target"]: entry["size"] for entry in usage}.values())
+  unreferenced = sum(entry["size"] for entry in usage if not entry["locked"])
+  click.echo(f"{len(usage)} packages, {format_size(total)} total, {format_size(unreferenced)} unreferenced.")
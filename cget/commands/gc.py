@@ -0,0 +1,58 @@
+#    CGet - A lightweight package manager for C++ projects using CMake and CPM.
+#    Copyright (C) 2025  Mohamed Ibrahim
+#
+#    This program is free software: you can redistribute it and/or modify
+#    it under the terms of the GNU General Public License as published by
+#    the Free Software Foundation, either version 3 of the License, or
+#    (at your option) any later version.
+#
+#    This program is distributed in the hope that it will be useful,
+#    but WITHOUT ANY WARRANTY; without even the implied warranty of
+#    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#    GNU General Public License for more details.
+#
+#    You should have received a copy of the GNU General Public License
+#    along with this program.  If not, see <https://www.gnu.org/licenses/>.
+#
+#    For questions, feedback, or contributions, you can reach me at:
+#                   Email: m.ibrahim9276@gmail.com
+
+
+import click
+from pathlib import Path
+from cget.commands.cache import format_size
+from cget.utils.gc import collect_garbage
+from cget.utils.misc import get_cpu_count, project_transaction
+from cget.utils.workspace import open_workspace
+
+
+@click.command("gc")
+@click.option("--dry-run", is_flag=True, default=False, help="List what would be removed without removing it")
+@click.option("--jobs", "-j", type=int, default=None, help="Number of directories to size in parallel (defaults to CPU count)")
+def gc_command(dry_run: bool, jobs: int):
+  """Remove installed package versions and extern/ links that cget.lock.json no longer pins"""
+  if not Path("cget.lock.json").exists():
+    click.echo("Error: cget.lock.json not found.")
+    return
+
+  try:
+    workspace = open_workspace(Path("."))
+  except ValueError as e:
+    raise click.ClickException(str(e))
+  extern_dirs = [Path("extern")] + [member / "extern" for member, _ in (workspace[0] if workspace else [])]
+
+  with project_transaction() as transaction:
+    removed = collect_garbage(transaction.lock, extern_dirs, jobs or get_cpu_count(), dry_run)
+
+  if not removed:
+    click.echo("Nothing to collect.")
+    return
+
+  for item in removed:
+    size = f", {format_size(item['size'])}" if item["size"] else ""
+    click.echo(f"{'Would remove' if dry_run else 'Removed'} {item['path']} ({item['reason']}{size})")
+
+  total = format_size(sum(item["size"] for item in removed))
+  click.echo(f"{len(removed)} entries, {total} {'would be reclaimed' if dry_run else 'reclaimed'}.")
+  if any(item["linked"] for item in removed):
+    click.echo("Linked packages live in the shared package store; `cget cache prune` frees their space.")
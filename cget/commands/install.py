@@ -19,8 +19,10 @@
 
 
 import click
-from cget.utils.misc import validate_project_root
-from cget.utils.install import install_dependency, install_all
+from pathlib import Path
+from cget.utils.misc import validate_project_root, get_cpu_count, project_transaction
+from cget.utils.install import install_dependency, install_all, check_lock_matches, verify_packages
+from cget.utils.workspace import open_workspace, link_member_headers
 
 
 @click.command("install")
@@ -28,14 +30,54 @@ from cget.utils.install import install_dependency, install_all
 @click.option("--dev", is_flag=True, default=False, help="Add to development enviroment only")
 @click.option("--force", is_flag=True, default=False, help="Force re-download of headers")
 @click.option("--platforms", default=None, help="Comma-separated list of supported platforms")
-def install_command(source: str, dev: bool, force: bool, platforms:str):
+@click.option("--fetch", default=None, help="What to download: full, headers, or comma-separated paths (e.g. include,cmake)")
+@click.option("--jobs", "-j", type=int, default=None, help="Number of dependencies to install in parallel (defaults to CPU count)")
+@click.option("--frozen", is_flag=True, default=False, help="Install exactly what cget.lock.json pins, failing if it disagrees with cget.json")
+@click.option("--offline", is_flag=True, default=False, help="Like --frozen, but never use the network (packages must be in the store)")
+def install_command(source: str, dev: bool, force: bool, platforms:str, fetch: str, jobs: int, frozen: bool, offline: bool):
   """Add a dependency by user/repo format, e.g. fmtlib/fmt"""
-  data = validate_project_root()
-  if not data:
+  try:
+    workspace = open_workspace(Path("."))
+  except ValueError as e:
+    raise click.ClickException(str(e))
+
+  if workspace is None and not validate_project_root():
     return
-  
+
+  if source and (frozen or offline):
+    raise click.UsageError("--frozen and --offline cannot be used when adding a dependency.")
+  if source and workspace:
+    raise click.UsageError("Add dependencies from inside a member project, then run `cget install` at the workspace root.")
+
+  # Whatever did install stays recorded; the exit status still reports the failure
   if source:
-    install_dependency(source, platforms, dev, data, force)
-  else:
-    installed_count = install_all(data, force)
-    click.echo(f"\nInstallation complete. {installed_count} packages installed or updated.")
\ No newline at end of file
+    with project_transaction() as transaction:
+      success = install_dependency(source, platforms, dev, transaction, force, fetch)
+    if not success:
+      raise click.ClickException(f"Could not install '{source}'.")
+    return
+
+  with project_transaction() as transaction:
+    members, data = workspace or (None, transaction.manifest)
+
+    frozen = frozen or offline
+    if frozen:
+      problems = check_lock_matches(data, transaction.lock)
+      if problems:
+        for problem in problems:
+          click.echo(f"Error: {problem}")
+        raise click.ClickException("cget.lock.json is out of date with cget.json. Run `cget install` or `cget update`.")
+
+    installed_count, success = install_all(transaction, force, jobs or get_cpu_count(), frozen, offline, data)
+    if frozen:
+      modified = [result for result in verify_packages(transaction.lock, jobs or get_cpu_count()) if result["status"] == "modified"]
+      for result in modified:
+        click.echo(f"Error: {result['name']}@{result['version']} does not match its hash in cget.lock.json")
+      if modified:
+        raise click.ClickException("Installed packages differ from what cget.lock.json pins. Run `cget verify` for details.")
+    if members:
+      link_member_headers(Path("."), members, transaction.lock)
+
+  if not success:
+    raise click.ClickException(f"Installation failed ({installed_count} packages installed or updated).")
+  click.echo(f"\nInstallation complete. {installed_count} packages installed or updated.")
\ No newline at end of file
@@ -0,0 +1,61 @@
+#    CGet - A lightweight package manager for C++ projects using CMake and CPM.
+#    Copyright (C) 2025  Mohamed Ibrahim
+#
+#    This program is free software: you can redistribute it and/or modify
+#    it under the terms of the GNU General Public License as published by
+#    the Free Software Foundation, either version 3 of the License, or
+#    (at your option) any later version.
+#
+#    This program is distributed in the hope that it will be useful,
+#    but WITHOUT ANY WARRANTY; without even the implied warranty of
+#    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#    GNU General Public License for more details.
+#
+#    You should have received a copy of the GNU General Public License
+#    along with this program.  If not, see <https://www.gnu.org/licenses/>.
+#
+#    For questions, feedback, or contributions, you can reach me at:
+#                   Email: m.ibrahim9276@gmail.com
+
+
+import click
+import os
+from pathlib import Path
+from cget.commands.cache import format_size
+from cget.utils.bundle import pack_bundle, bundle_compression
+from cget.utils.misc import get_cpu_count, load_lock
+
+
+@click.command("pack")
+@click.argument("output", default="cget-bundle.tar.gz")
+@click.option("--jobs", "-j", type=int, default=None, help="Number of files to hash in parallel (defaults to CPU count)")
+def pack_command(output: str, jobs: int):
+  """Bundle every locked dependency into one archive for offline installs (use - for stdout)"""
+  to_stdout = output == "-"
+  if not Path("cget.lock.json").exists():
+    click.echo("Error: cget.lock.json not found. Run `cget install` first.", err=to_stdout)
+    return
+
+  lock = load_lock()
+  jobs = jobs or get_cpu_count()
+  try:
+    if to_stdout:
+      stats = pack_bundle(lock, click.get_binary_stream("stdout"), "gz", jobs)
+    else:
+      # Written beside the target and renamed, so an interrupted pack never leaves a truncated bundle
+      tmp = f"{output}.tmp"
+      try:
+        with open(tmp, "wb") as f:
+          stats = pack_bundle(lock, f, bundle_compression(output), jobs)
+        os.replace(tmp, output)
+      finally:
+        if os.path.exists(tmp):
+          os.remove(tmp)
+  except ValueError as e:
+    raise click.ClickException(str(e))
+
+  click.echo(
+    f"Packed {stats['packages']} packages ({stats['files']} files, {stats['blobs']} unique, "
+    f"{format_size(stats['bytes'])})" + ("." if to_stdout else f" into {output} ({format_size(os.path.getsize(output))})."),
+    err=to_stdout
+  )
@@ -19,63 +19,67 @@
 
 import click
 import os
-import json
-import shutil
-from cget.utils.misc import save_lock, load_lock
-from pathlib import Path
+from cget.utils.install import lock_closure, unlink_package
+from cget.utils.misc import Transaction, project_transaction
+from cget.utils.resolver import parse_requirement
+from cget.utils.sources import split_source
 
 
-@click.command("uninstall")
-@click.argument("source")
-def uninstall_command(source: str):
-  """Uninstall a dependency by source"""
-  if not os.path.exists("cget.json"):
-    click.echo("Error: cget.json not found.")
-    return
-  
-  with open("cget.json", "r") as f:
-    data = json.load(f)
-
-  found = False
+def remove_dependency(transaction: Transaction, source: str) -> list[dict] | None:
+  """
+  Removes source from cget.json and every lock entry the remaining dependencies no longer reach.
+  Returns the removed lock entries, or None if source is not a dependency.
+  """
+  data = transaction.manifest
+  # cget.json keeps "user/repo@version" while the lock stores "user/repo", compare without the version
+  repo = split_source(source)[0]
+  names = []
 
   for section in ["dependencies", "devDependencies"]:
     deps = data.get(section, [])
-    filtered = [d for d in deps if d["source"] != source]
+    filtered = [d for d in deps if split_source(d["source"])[0] != repo]
 
     if len(filtered) != len(deps):
+      names += [parse_requirement(d)[0] for d in deps if d not in filtered]
       data[section] = filtered
-      found = True
       click.echo(f"Removed '{source}' from {section}.")
 
-  if not found:
+  if not names:
     click.echo(f"Dependency '{source}' not found.")
-    return
+    return None
 
-  with open("cget.json", "w") as f:
-    json.dump(data, f, indent=2)
-  
-  if os.path.exists("cget.lock.json"):
-    lock_data = load_lock()
-
-    to_remove = None
-    for name, meta in lock_data.items():
-      if meta.get("source") == source:
-        to_remove = name
-        break
+  lock_data = transaction.lock
+  roots = [parse_requirement(d)[0] for section in ["dependencies", "devDependencies"] for d in data.get(section, [])]
+  try:
+    kept = lock_closure(lock_data, roots)
+  except ValueError as e:
+    raise click.ClickException(f"{e}. Run `cget install` to repair the lock first.")
 
-    if to_remove:
-      del lock_data[to_remove]
-      save_lock(lock_data)
-      click.echo(f"Updated cget.lock.json to remove '{to_remove}'.")
+  for name in names:
+    if name in kept:
+      users = sorted(user for user, entry in kept.items() if name in entry.get("dependencies", []))
+      click.echo(f"'{name}' is still required by {', '.join(users)}, keeping it installed.")
 
-  _,repo = source.split("/", 1)
+  removed = [entry for name, entry in lock_data.items() if name not in kept]
+  if removed:
+    transaction.lock = kept
+    click.echo(f"Updated cget.lock.json to remove {', '.join(repr(entry['name']) for entry in removed)}.")
+  return removed
 
-  extern_path = Path(os.path.join("extern", repo))
-  if extern_path.exists() or extern_path.is_symlink():
-        extern_path.unlink()
 
-  package_path = os.path.join(".cget_packages", repo)
-  if os.path.exists(package_path):
-    shutil.rmtree(package_path)
+@click.command("uninstall")
+@click.argument("source")
+def uninstall_command(source: str):
+  """Uninstall a dependency by source"""
+  if not os.path.exists("cget.json"):
+    click.echo("Error: cget.json not found.")
+    return
+  
+  with project_transaction() as transaction:
+    removed = remove_dependency(transaction, source)
+    # Packages are installed as .cget_packages/<name>@<version>
+    for entry in removed or []:
+      unlink_package(entry["name"], entry["version"])
 
-  click.echo(f"Removed dependency '{source}'")
\ No newline at end of file
+  if removed is not None:
+    click.echo(f"Removed dependency '{source}'")
@@ -0,0 +1,65 @@
+#    CGet - A lightweight package manager for C++ projects using CMake and CPM.
+#    Copyright (C) 2025  Mohamed Ibrahim
+#
+#    This program is free software: you can redistribute it and/or modify
+#    it under the terms of the GNU General Public License as published by
+#    the Free Software Foundation, either version 3 of the License, or
+#    (at your option) any later version.
+#
+#    This program is distributed in the hope that it will be useful,
+#    but WITHOUT ANY WARRANTY; without even the implied warranty of
+#    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#    GNU General Public License for more details.
+#
+#    You should have received a copy of the GNU General Public License
+#    along with this program.  If not, see <https://www.gnu.org/licenses/>.
+#
+#    For questions, feedback, or contributions, you can reach me at:
+#                   Email: m.ibrahim9276@gmail.com
+
+
+import click
+import tarfile
+from pathlib import Path
+from cget.utils.bundle import unpack_bundle
+from cget.utils.install import install_package
+from cget.utils.misc import get_cpu_count, run_parallel, project_transaction
+from cget.utils.workspace import open_workspace, link_member_headers
+
+
+@click.command("unpack")
+@click.argument("bundle", default="cget-bundle.tar.gz")
+@click.option("--jobs", "-j", type=int, default=None, help="Number of threads verifying and writing files (defaults to CPU count)")
+def unpack_command(bundle: str, jobs: int):
+  """Restore dependencies from a `cget pack` bundle without network access (use - for stdin)"""
+  jobs = jobs or get_cpu_count()
+  try:
+    if bundle == "-":
+      manifest = unpack_bundle(click.get_binary_stream("stdin"), jobs)
+    else:
+      with open(bundle, "rb") as f:
+        manifest = unpack_bundle(f, jobs)
+  except (ValueError, OSError, tarfile.TarError) as e:
+    raise click.ClickException(f"Cannot unpack {bundle}: {e}")
+
+  click.echo(f"Restored {manifest['restored']} of {len(manifest['packages'])} packages into the package store.")
+
+  with project_transaction() as transaction:
+    if not transaction.lock:
+      transaction.lock = manifest["lock"]
+
+    for name, entry in transaction.lock.items():
+      bundled = manifest["packages"].get(name)
+      if not bundled or bundled["version"] != entry["version"] or (entry.get("commit") and bundled["commit"] != entry["commit"]):
+        click.echo(f"Warning: the bundle does not contain {name}@{entry['version']} as cget.lock.json pins it")
+
+    results = run_parallel(lambda entry: install_package(entry, False, jobs > 1, offline=True), list(transaction.lock.values()), jobs)
+
+    workspace = open_workspace(Path("."))
+    if workspace:
+      link_member_headers(Path("."), workspace[0], transaction.lock)
+
+  failed = [name for name, status in results if status == "failed"]
+  if failed:
+    raise click.ClickException(f"Could not install {', '.join(failed)} from the bundle.")
+  click.echo("All dependencies restored.")
@@ -1,52 +1,112 @@
 import click
 import os
-import json
-from cget.utils.install import download_package
-from cget.utils.misc import find_best_tag, save_lock
+from pathlib import Path
+from cget.utils.install import install_package, build_lock, record_commits, record_hashes, plan_update, unlink_package
+from cget.utils.misc import Transaction, get_cpu_count, run_parallel, project_transaction, NETWORK_ERRORS
+from cget.utils.resolver import resolve_dependencies, ResolutionError
+from cget.utils.workspace import open_workspace, link_member_headers
+
+
+def describe_step(step: dict) -> str:
+  old = step["old"]["version"] if step["old"] else "-"
+  new = step["new"]["version"] if step["new"] else "-"
+  versions = new if old == new else f"{old} -> {new}"
+  return f"  {step['action']:<10} {step['name']:<24} {versions}"
+
+
+def update_dependency(step: dict, quiet: bool) -> tuple[str, bool]:
+  name = step["name"]
+  entry = step["new"]
+
+  # A moved tag keeps its version, so only a forced fetch can replace the stored checkout
+  _, status = install_package(entry, step["action"] == "retag", quiet)
+  if status == "failed":
+    click.echo(f"Failed to update '{name}'")
+    return name, False
+
+  if step["old"] and step["old"]["version"] != entry["version"]:
+    unlink_package(name, step["old"]["version"], header=False)
+
+  click.echo(f"Updated '{name}' to version '{entry['version']}'")
+  return name, True
 
 
 @click.command("update")
-def update_command():
+@click.option("--jobs", "-j", type=int, default=None, help="Number of dependencies to update in parallel (defaults to CPU count)")
+@click.option("--dry-run", is_flag=True, default=False, help="Print what would change without touching the project")
+def update_command(jobs: int, dry_run: bool):
   """Update all dependencies to latest compatible versions and update lock file"""
-  if not os.path.exists("cget.json"):
+  try:
+    workspace = open_workspace(Path("."))
+  except ValueError as e:
+    raise click.ClickException(str(e))
+
+  if workspace is None and not os.path.exists("cget.json"):
     click.echo("Error: cget.json not found.")
     return
 
-  with open("cget.json", "r") as f:
-    manifest = json.load(f)
+  with project_transaction() as transaction:
+    members, manifest = workspace or (None, transaction.manifest)
+    success = update_project(transaction, jobs or get_cpu_count(), dry_run, manifest)
+    if members and not dry_run:
+      link_member_headers(Path("."), members, transaction.lock)
+
+  # Packages that did update stay locked; the exit status still reports the failure
+  if not success:
+    raise click.ClickException("Update failed.")
 
+
+def update_project(transaction: Transaction, jobs: int, dry_run: bool, manifest: dict | None = None) -> bool:
+  """Resolves and installs the newest allowed versions. Returns False if resolution or any package failed."""
+  manifest = manifest or transaction.manifest
   all_sections = ["dependencies", "devDependencies"]
-  combined_lock_data = {}
-
-  for section in all_sections:
-    deps = manifest.get(section, [])
-    if not deps:
-      continue
-
-    for dep in deps:
-      name = dep["name"]
-      version_range = dep.get("version", "latest")
-      source = dep.get("source")
-      
-      if not source:
-        # Default to user/repo = name if source not set
-        source = name
-
-      resolved_version = find_best_tag(source, version_range)
-
-      success = download_package(name, source, resolved_version, updated=True, force=True)
-      if not success:
-        click.echo(f"Failed to update '{name}'")
-        continue
-
-      combined_lock_data[name] = {
-        "name": name,
-        "source": source,
-        "resolved": f"https://github.com/{source}.git",
-        "version": resolved_version
-      }
-
-      click.echo(f"Updated '{name}' to version '{resolved_version}'")
-
-  save_lock(combined_lock_data)
-  click.echo("All dependencies updated and lock file saved.")
\ No newline at end of file
+  deps = [dep for section in all_sections for dep in manifest.get(section, [])]
+
+  try:
+    solution = resolve_dependencies(deps, None, jobs)
+  except (ResolutionError, *NETWORK_ERRORS) as e:
+    click.echo(f"Error: {e}")
+    return False
+
+  old_lock = transaction.lock
+  resolved = build_lock(solution, manifest, old_lock, follow_tags=True)
+  steps = plan_update(old_lock, resolved)
+  changes = [step for step in steps if step["action"] != "unchanged"]
+
+  click.echo("Update plan:")
+  for step in steps:
+    click.echo(describe_step(step))
+
+  if dry_run:
+    click.echo(f"\n{len(changes)} of {len(steps)} packages would change (dry run, nothing was modified).")
+    return True
+
+  if not changes:
+    click.echo("All dependencies are up to date.")
+    return True
+
+  new_lock = dict(resolved)
+  failed = []
+  pending = [step for step in changes if step["action"] != "remove"]
+  for name, success in run_parallel(lambda step: update_dependency(step, jobs > 1), pending, jobs):
+    if not success:
+      failed.append(name)
+      # Keep the previous pin rather than locking a version that is not installed
+      if name in old_lock:
+        new_lock[name] = old_lock[name]
+      else:
+        del new_lock[name]
+
+  for step in changes:
+    if step["action"] == "remove":
+      unlink_package(step["name"], step["old"]["version"])
+      click.echo(f"Removed '{step['name']}'")
+
+  record_commits(new_lock)
+  record_hashes(new_lock, jobs)
+  transaction.lock = new_lock
+  if failed:
+    click.echo(f"Lock file saved, {len(failed)} of {len(changes)} packages failed to update: {', '.join(sorted(failed))}")
+    return False
+  click.echo(f"All dependencies updated and lock file saved ({len(changes)} changed).")
+  return True
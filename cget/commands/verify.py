@@ -0,0 +1,63 @@
+#    CGet - A lightweight package manager for C++ projects using CMake and CPM.
+#    Copyright (C) 2025  Mohamed Ibrahim
+#
+#    This program is free software: you can redistribute it and/or modify
+#    it under the terms of the GNU General Public License as published by
+#    the Free Software Foundation, either version 3 of the License, or
+#    (at your option) any later version.
+#
+#    This program is distributed in the hope that it will be useful,
+#    but WITHOUT ANY WARRANTY; without even the implied warranty of
+#    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#    GNU General Public License for more details.
+#
+#    You should have received a copy of the GNU General Public License
+#    along with this program.  If not, see <https://www.gnu.org/licenses/>.
+#
+#    For questions, feedback, or contributions, you can reach me at:
+#                   Email: m.ibrahim9276@gmail.com
+
+
+import click
+import time
+from pathlib import Path
+from cget.utils.install import verify_packages, record_hashes
+from cget.utils.misc import get_cpu_count, project_transaction
+
+
+STATUS_LABELS = {
+  "ok": "ok",
+  "modified": "MODIFIED",
+  "missing": "MISSING",
+  "unhashed": "no hash"
+}
+
+
+@click.command("verify")
+@click.option("--jobs", "-j", type=int, default=None, help="Number of files to hash in parallel (defaults to CPU count)")
+@click.option("--no-cache", is_flag=True, default=False, help="Re-read every file instead of trusting unchanged size and mtime")
+@click.option("--record", is_flag=True, default=False, help="Record hashes for lock entries that have none yet")
+def verify_command(jobs: int, no_cache: bool, record: bool):
+  """Check installed packages against the content hashes in cget.lock.json"""
+  if not Path("cget.lock.json").exists():
+    click.echo("Error: cget.lock.json not found.")
+    return
+
+  jobs = jobs or get_cpu_count()
+  start = time.perf_counter()
+  with project_transaction() as transaction:
+    if record:
+      record_hashes(transaction.lock, jobs)
+    results = verify_packages(transaction.lock, jobs, not no_cache)
+
+  for result in results:
+    click.echo(f"  {STATUS_LABELS[result['status']]:<10} {result['name']}@{result['version']}")
+
+  hashed = sum(result["hashed"] for result in results)
+  click.echo(f"Verified {len(results)} packages in {time.perf_counter() - start:.2f}s ({hashed} files read).")
+
+  if any(result["status"] == "unhashed" for result in results):
+    click.echo("Packages without a hash were locked by an older cget; run `cget verify --record` to add them.")
+  failed = [result for result in results if result["status"] in ("modified", "missing")]
+  if failed:
+    raise click.ClickException(f"{len(failed)} packages do not match cget.lock.json.")
@@ -2,5 +2,7 @@ GITIGNORE = [
   "build/",
   "cget.json",
   ".gitignore",
-  ".cget_packages"
+  ".cget_packages",
+  "_dependencies.cmake",
+  ".cget_lock"
 ]
\ No newline at end of file
@@ -0,0 +1,104 @@
+import hashlib
+import json
+import re
+import shutil
+from pathlib import Path
+
+
+FINGERPRINT_FILE = ".cget_fingerprint"
+
+
+def compute_fingerprint(project_root: Path, data: dict, configure_args: list[str]) -> str:
+  """Hashes everything that feeds the CMake configure step."""
+  digest = hashlib.sha256()
+
+  for filename in ["cget.json", "cget.lock.json", "cget-workspace.json"]:
+    path = project_root / filename
+    digest.update(filename.encode())
+    digest.update(path.read_bytes() if path.exists() else b"")
+
+  digest.update(json.dumps(data.get("compilerOptions", {}), sort_keys=True).encode())
+  digest.update("\0".join(configure_args).encode())
+
+  return digest.hexdigest()
+
+
+def is_configured(build_dir: Path, fingerprint: str) -> bool:
+  """True if build_dir was configured successfully with the same inputs."""
+  path = build_dir / FINGERPRINT_FILE
+  if not (build_dir / "CMakeCache.txt").exists() or not path.exists():
+    return False
+  return path.read_text().strip() == fingerprint
+
+
+def save_fingerprint(build_dir: Path, fingerprint: str | None):
+  path = build_dir / FINGERPRINT_FILE
+  if fingerprint is None:
+    if path.exists():
+      path.unlink()
+    return
+  path.write_text(fingerprint)
+
+
+def get_cached_generator(build_dir: Path) -> str | None:
+  """The generator an existing build dir was configured with; CMake refuses to switch it."""
+  cache = build_dir / "CMakeCache.txt"
+  if not cache.exists():
+    return None
+
+  match = re.search(r"^CMAKE_GENERATOR:INTERNAL=(.*)$", cache.read_text(errors="replace"), re.MULTILINE)
+  return match.group(1) if match else None
+
+
+def select_generator(build_dir: Path, generator: str | None) -> str | None:
+  """Uses Ninja for fresh build dirs when it is available and no generator was requested."""
+  if generator or get_cached_generator(build_dir):
+    return generator
+
+  if shutil.which("ninja"):
+    return "Ninja"
+
+  return None
+
+
+def variant_name(build_type: str, generator: str | None) -> str:
+  """Build directory name of a matrix variant, e.g. release or release-ninja-multi-config."""
+  name = build_type if not generator else f"{build_type}-{generator}"
+  return re.sub(r"[^a-z0-9]+", "-", name.lower()).strip("-")
+
+
+def parse_matrix(entries: list | None, generator: str | None = None) -> list[dict]:
+  """
+  Build matrix variants from --matrix or the "buildMatrix" section of cget.json. An entry is a build
+  type with an optional generator ("Release" or "Release:Ninja") or an object with "buildType" and
+  optionally "generator" and "name". `generator` is the default for entries that name none.
+  """
+  if not entries:
+    raise ValueError("No build variants: pass --matrix Debug,Release or add \"buildMatrix\" to cget.json.")
+
+  variants = []
+  for entry in entries:
+    if isinstance(entry, str):
+      build_type, _, entry_generator = entry.strip().partition(":")
+      entry = {"buildType": build_type.strip(), "generator": entry_generator.strip() or None}
+    if not isinstance(entry, dict) or not entry.get("buildType"):
+      raise ValueError(f"Invalid build matrix entry: {entry!r}")
+
+    variant_generator = entry.get("generator") or generator
+    variants.append({
+      "name": entry.get("name") or variant_name(entry["buildType"], entry.get("generator")),
+      "build_type": entry["buildType"],
+      "generator": variant_generator
+    })
+
+  names = [variant["name"] for variant in variants]
+  duplicates = sorted({name for name in names if names.count(name) > 1})
+  if duplicates:
+    raise ValueError(f"Build matrix variants share a build directory: {', '.join(duplicates)}")
+  return variants
+
+
+def split_jobs(total: int, count: int) -> list[int]:
+  """Divides `total` compile jobs between `count` concurrent builds (at least one each)."""
+  share, extra = divmod(total, count)
+  return [max(1, share + (1 if index < extra else 0)) for index in range(count)]
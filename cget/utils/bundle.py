@@ -0,0 +1,177 @@
+import io
+import json
+import os
+import tarfile
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import ExitStack
+from pathlib import Path, PurePosixPath
+from cget.utils import store
+from cget.utils.fetch import fetch_variant
+from cget.utils.hashing import hash_bytes, hash_trees
+from cget.utils.trace import span, traced
+
+
+BUNDLE_MANIFEST = "cget-bundle.json"
+BUNDLE_FORMAT = 1
+# Blobs read ahead of the verify/write workers; bounds the memory an unpack can use
+MAX_PENDING_BYTES = 256 * 1024 * 1024
+
+
+def bundle_compression(path: str) -> str:
+  """The tarfile stream compression for an output path: xz, bz2, none for .tar, gzip otherwise."""
+  if path.endswith((".tar.xz", ".txz")):
+    return "xz"
+  if path.endswith((".tar.bz2", ".tbz2")):
+    return "bz2"
+  if path.endswith(".tar"):
+    return ""
+  return "gz"
+
+
+def safe_path(root: Path, relative: str) -> Path:
+  """root/relative, refusing paths from a bundle that would escape root."""
+  parts = PurePosixPath(relative).parts
+  if not parts or PurePosixPath(relative).is_absolute() or ".." in parts:
+    raise ValueError(f"refusing unsafe path in bundle: {relative}")
+  return root.joinpath(*parts)
+
+
+def locate_packages(lock: dict) -> list[dict]:
+  packages = []
+  for name, entry in sorted(lock.items()):
+    installed = Path(".cget_packages") / f"{name}@{entry['version']}"
+    if not installed.is_dir():
+      raise ValueError(f"{name}@{entry['version']} is not installed, run `cget install` first")
+
+    root = installed.resolve()
+    # The store entry's name is what unpack files the tree under, so it must agree with the lock
+    commit = store.entry_commit(root) if installed.is_symlink() else entry.get("commit")
+    if installed.is_symlink() and entry.get("commit") not in (None, commit):
+      raise ValueError(f"{name}@{entry['version']} links commit {commit[:12]} but cget.lock.json pins {entry['commit'][:12]}, run `cget install` first")
+    if not commit:
+      raise ValueError(f"{name}@{entry['version']} has no commit in cget.lock.json, run `cget install` first")
+    packages.append({"name": name, "entry": entry, "root": root, "commit": commit})
+  return packages
+
+
+def add_member(tar: tarfile.TarFile, name: str, fileobj, size: int):
+  info = tarfile.TarInfo(name)
+  info.size = size
+  info.mode = 0o644
+  tar.addfile(info, fileobj)
+
+
+@traced("pack_bundle")
+def pack_bundle(lock: dict, fileobj, compression: str, jobs: int) -> dict:
+  """
+  Streams every locked package into one tar: cget-bundle.json (the lock plus each package's file
+  list) first, then the contents of every distinct file once as blobs/<sha256>. Returns statistics.
+  """
+  packages = locate_packages(lock)
+  with span("hash_files", packages=len(packages)):
+    trees = hash_trees([package["root"] for package in packages], jobs)
+
+  manifest = {"format": BUNDLE_FORMAT, "lock": lock, "packages": {}}
+  blobs: dict[str, Path] = {}
+  for package, tree in zip(packages, trees):
+    entry = package["entry"]
+    for relative, (sha, _) in tree["files"].items():
+      blobs.setdefault(sha, package["root"] / relative)
+
+    manifest["packages"][package["name"]] = {
+      "source": entry["source"],
+      "version": entry["version"],
+      "commit": package["commit"],
+      "fetch": entry.get("fetch"),
+      "files": {relative: list(file) for relative, file in tree["files"].items()},
+      "links": tree["links"]
+    }
+
+  size = 0
+  with tarfile.open(fileobj=fileobj, mode=f"w|{compression}") as tar:
+    data = json.dumps(manifest, sort_keys=True).encode()
+    add_member(tar, BUNDLE_MANIFEST, io.BytesIO(data), len(data))
+    for sha, path in blobs.items():
+      with open(path, "rb") as f:
+        blob_size = os.fstat(f.fileno()).st_size
+        add_member(tar, f"blobs/{sha}", f, blob_size)
+      size += blob_size
+
+  files = sum(len(tree["files"]) for tree in trees)
+  return {"packages": len(packages), "files": files, "blobs": len(blobs), "bytes": size}
+
+
+def write_blob(sha: str, data: bytes, targets: list[tuple[Path, int]]):
+  if hash_bytes(data) != sha:
+    raise ValueError(f"blob {sha[:12]} is corrupt (content does not match its hash)")
+
+  for path, mode in targets:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with open(path, "wb") as f:
+      f.write(data)
+    os.chmod(path, mode)
+
+
+@traced("unpack_bundle")
+def unpack_bundle(fileobj, jobs: int) -> dict:
+  """
+  Restores the packages of a bundle into the package store in one sequential read, verifying and
+  writing blobs on `jobs` threads while the stream is decompressed. Packages already stored are
+  skipped. Returns the bundle manifest.
+  """
+  with tarfile.open(fileobj=fileobj, mode="r|*") as tar, ExitStack() as stack:
+    member = tar.next()
+    if member is None or member.name != BUNDLE_MANIFEST:
+      raise ValueError(f"not a cget bundle (it must start with {BUNDLE_MANIFEST})")
+    manifest = json.load(tar.extractfile(member))
+    if manifest.get("format") != BUNDLE_FORMAT:
+      raise ValueError(f"unsupported bundle format {manifest.get('format')}")
+
+    targets: dict[str, list[tuple[Path, int]]] = {}
+    restoring = []
+    for name, package in manifest["packages"].items():
+      variant = fetch_variant(package.get("fetch"))
+      if store.lookup_commit(package["source"], package["version"], package["commit"], variant):
+        continue
+
+      checkout = Path(stack.enter_context(store.staging_dir(package["source"]))) / name
+      checkout.mkdir()
+      restoring.append((package, checkout, variant))
+      for relative, (sha, mode) in package["files"].items():
+        targets.setdefault(sha, []).append((safe_path(checkout, relative), mode))
+
+    seen = set()
+    pending = deque()
+    pending_bytes = 0
+    with ThreadPoolExecutor(max_workers=max(jobs, 1)) as pool:
+      for member in tar:
+        sha = member.name.removeprefix("blobs/")
+        if not member.isfile() or sha not in targets or sha in seen:
+          continue
+
+        data = tar.extractfile(member).read()
+        seen.add(sha)
+        pending.append((pool.submit(write_blob, sha, data, targets[sha]), len(data)))
+        pending_bytes += len(data)
+        while pending_bytes > MAX_PENDING_BYTES:
+          future, size = pending.popleft()
+          future.result()
+          pending_bytes -= size
+
+      for future, _ in pending:
+        future.result()
+
+    missing = targets.keys() - seen
+    if missing:
+      raise ValueError(f"bundle is truncated, {len(missing)} blobs are missing")
+
+    for package, checkout, variant in restoring:
+      for relative, target in package.get("links", {}).items():
+        link = safe_path(checkout, relative)
+        link.parent.mkdir(parents=True, exist_ok=True)
+        os.symlink(target, link)
+      store.add(package["source"], package["version"], checkout, package["commit"], variant=variant)
+
+  manifest["restored"] = len(restoring)
+  return manifest
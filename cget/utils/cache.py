@@ -0,0 +1,92 @@
+import json
+import os
+import re
+import stat
+import time
+import tempfile
+from pathlib import Path
+from cget.utils.sources import source_path
+
+
+TAG_CACHE_TTL = int(os.environ.get("CGET_TAG_CACHE_TTL", 3600))
+
+
+def get_cache_dir() -> Path:
+  """Returns the per-user cget cache directory, honouring CGET_CACHE_DIR and XDG_CACHE_HOME."""
+  if os.environ.get("CGET_CACHE_DIR"):
+    return Path(os.environ["CGET_CACHE_DIR"])
+
+  if os.environ.get("XDG_CACHE_HOME"):
+    return Path(os.environ["XDG_CACHE_HOME"]) / "cget"
+
+  if os.name == "nt" and os.environ.get("LOCALAPPDATA"):
+    return Path(os.environ["LOCALAPPDATA"]) / "cget" / "cache"
+
+  return Path.home() / ".cache" / "cget"
+
+
+def source_key(source: str) -> str:
+  return re.sub(r"[^A-Za-z0-9._-]", "_", source_path(source).replace("/", "__"))
+
+
+def write_json_atomic(path: Path, data):
+  path.parent.mkdir(parents=True, exist_ok=True)
+  fd, tmp = tempfile.mkstemp(dir=path.parent, prefix=f".{path.name}.", suffix=".tmp")
+  try:
+    with os.fdopen(fd, "w") as f:
+      json.dump(data, f, indent=2)
+    # mkstemp creates 0600 files, keep the permissions a plain open() would have given
+    os.chmod(tmp, stat.S_IMODE(os.stat(path).st_mode) if path.exists() else 0o644)
+    os.replace(tmp, path)
+  except BaseException:
+    if os.path.exists(tmp):
+      os.remove(tmp)
+    raise
+
+
+def read_json(path: Path):
+  try:
+    with open(path, "r") as f:
+      return json.load(f)
+  except (OSError, ValueError):
+    return None
+
+
+def tag_cache_path(source: str) -> Path:
+  return get_cache_dir() / "tags" / f"{source_key(source)}.json"
+
+
+def load_tag_cache(source: str) -> dict | None:
+  entry = read_json(tag_cache_path(source))
+  if not isinstance(entry, dict) or "tags" not in entry:
+    return None
+  return entry
+
+
+def save_tag_cache(source: str, entry: dict):
+  try:
+    write_json_atomic(tag_cache_path(source), entry)
+  except OSError:
+    # The cache is an optimisation only; a read-only home must not break installs
+    pass
+
+
+def is_fresh(entry: dict, ttl: int = TAG_CACHE_TTL) -> bool:
+  return time.time() - entry.get("fetched", 0) < ttl
+
+
+def manifest_cache_path(source: str, version: str) -> Path:
+  return get_cache_dir() / "manifests" / source_key(source) / f"{version}.json"
+
+
+def load_manifest_cache(source: str, version: str) -> dict | None:
+  """Returns {"manifest": ...} if the manifest of source@version was seen before. Tags are immutable, so no TTL."""
+  entry = read_json(manifest_cache_path(source, version))
+  return entry if isinstance(entry, dict) and "manifest" in entry else None
+
+
+def save_manifest_cache(source: str, version: str, manifest: dict | None):
+  try:
+    write_json_atomic(manifest_cache_path(source, version), {"manifest": manifest})
+  except OSError:
+    pass
@@ -0,0 +1,77 @@
+import json
+import os
+import shutil
+import subprocess
+import click
+from pathlib import Path
+from cget.utils.cache import get_cache_dir
+
+
+COMPILER_CACHES = ["auto", "ccache", "sccache", "none"]
+CACHE_DIR_ENV = {"ccache": "CCACHE_DIR", "sccache": "SCCACHE_DIR"}
+
+
+def detect_compiler_cache(mode: str | None) -> dict | None:
+  """Resolves a compilerCache setting to {"tool", "path", "dir"}, or None when disabled or missing."""
+  if not mode or mode == "none":
+    return None
+
+  tools = ["ccache", "sccache"] if mode == "auto" else [mode]
+  for tool in tools:
+    path = shutil.which(tool)
+    if path:
+      cache_dir = os.environ.get(CACHE_DIR_ENV[tool]) or str(get_cache_dir() / tool)
+      return {"tool": tool, "path": Path(path).as_posix(), "dir": Path(cache_dir).as_posix()}
+
+  if mode != "auto":
+    click.echo(f"Warning: compiler cache '{mode}' not found on PATH, building without it.")
+  return None
+
+
+def generate_compiler_cache(cache: dict) -> str:
+  """Must precede the dependencies: CMake reads the launcher when a target is created."""
+
+  launcher = f'${{CMAKE_COMMAND}};-E;env;{CACHE_DIR_ENV[cache["tool"]]}={cache["dir"]};{cache["path"]}'
+  lines = [
+    "# start of compiler cache",
+    f'set(CMAKE_C_COMPILER_LAUNCHER "{launcher}")',
+    f'set(CMAKE_CXX_COMPILER_LAUNCHER "{launcher}")',
+    "# end of compiler cache"
+  ]
+  return "\n".join(lines)
+
+
+def read_stats(cache: dict) -> tuple[int, int] | None:
+  """Returns the (hits, misses) counters of the compiler cache, or None if they cannot be read."""
+  env = dict(os.environ, **{CACHE_DIR_ENV[cache["tool"]]: cache["dir"]})
+
+  try:
+    if cache["tool"] == "ccache":
+      result = subprocess.run([cache["path"], "--print-stats"], capture_output=True, text=True, env=env, check=True)
+      stats = {}
+      for line in result.stdout.splitlines():
+        key, _, value = line.partition("\t")
+        if value.strip().isdigit():
+          stats[key] = int(value)
+      hits = stats.get("direct_cache_hit", 0) + stats.get("preprocessed_cache_hit", 0)
+      return hits, stats.get("cache_miss", 0)
+
+    result = subprocess.run([cache["path"], "--show-stats", "--stats-format=json"], capture_output=True, text=True, env=env, check=True)
+    stats = json.loads(result.stdout)["stats"]
+    hits = sum(stats.get("cache_hits", {}).get("counts", {}).values())
+    misses = sum(stats.get("cache_misses", {}).get("counts", {}).values())
+    return hits, misses
+  except (OSError, subprocess.CalledProcessError, ValueError, KeyError):
+    return None
+
+
+def report_stats(cache: dict, before: tuple[int, int] | None, after: tuple[int, int] | None):
+  if before is None or after is None:
+    click.echo(f"Could not read {cache['tool']} statistics.")
+    return
+
+  hits = after[0] - before[0]
+  misses = after[1] - before[1]
+  total = hits + misses
+  ratio = f"{hits / total:.0%}" if total else "n/a"
+  click.echo(f"{cache['tool']}: {hits} hits, {misses} misses ({ratio} hit rate)")
@@ -0,0 +1,237 @@
+import click
+import hashlib
+import json
+import shutil
+import stat
+import subprocess
+from pathlib import Path
+from cget.utils import store
+from cget.utils.headers import HEADER_EXTENSIONS
+from cget.utils.misc import find_tag_name, remove_path, NETWORK_ERRORS
+from cget.utils.sources import github_slug, repo_url
+from cget.utils.trace import span
+
+
+CMAKE_PATTERNS = ["CMakeLists.txt", "*.cmake", "*.cmake.in"]
+# Always materialized so the resolver can read the manifest and licenses travel with the code
+ALWAYS_PATTERNS = ["/cget.json", "/LICENSE*", "/COPYING*"]
+
+
+def sparse_patterns(fetch) -> list[str] | None:
+  """
+  Sparse-checkout patterns for a dependency's "fetch" setting: "full" (or unset) checks out
+  everything, "headers" only headers and CMake files, a list of paths only those paths.
+  """
+  if fetch in (None, "full"):
+    return None
+  if fetch == "headers":
+    return [f"*{ext}" for ext in sorted(HEADER_EXTENSIONS)] + CMAKE_PATTERNS + ALWAYS_PATTERNS
+  if isinstance(fetch, list) and fetch and all(isinstance(path, str) and path.strip("/") for path in fetch):
+    return ["/" + path.strip("/") for path in fetch] + ALWAYS_PATTERNS
+  raise ValueError(f"invalid fetch setting {fetch!r}, expected \"full\", \"headers\" or a list of paths")
+
+
+def fetch_variant(fetch) -> str | None:
+  """Names the store variant of a partial checkout, so it is never mistaken for a full one."""
+  if fetch in (None, "full"):
+    return None
+  if fetch == "headers":
+    return "headers"
+  digest = hashlib.sha1(json.dumps(sorted(fetch)).encode()).hexdigest()[:10]
+  return f"paths-{digest}"
+
+
+def strip_first_component(name: str) -> str | None:
+  parts = name.split("/", 1)
+  return parts[1] if len(parts) == 2 and parts[1] else None
+
+
+def package_filter(member, dest_path: str):
+  """
+  tarfile's "data" filter, except that symlinks may point outside the package as they can in a git
+  checkout. No member is written outside dest_path, also not through such a link.
+  """
+  import tarfile
+
+  return (tarfile.tar_filter if member.issym() else tarfile.data_filter)(member, dest_path)
+
+
+def extract_stream(fileobj, dest: Path) -> str | None:
+  """
+  Extracts a streamed .tar.gz into dest, dropping the archive's top-level directory.
+  Returns the commit recorded by `git archive` in the pax header, if any.
+  """
+  import tarfile
+
+  dest.mkdir(parents=True, exist_ok=True)
+
+  with tarfile.open(fileobj=fileobj, mode="r|gz") as tar:
+    for member in tar:
+      name = strip_first_component(member.name)
+      if name is None:
+        continue
+
+      member.name = name
+      if member.islnk():
+        member.linkname = strip_first_component(member.linkname) or member.linkname
+
+      if hasattr(tarfile, "data_filter"):
+        try:
+          tar.extract(member, dest, filter=package_filter)
+        except tarfile.FilterError as e:
+          raise RuntimeError(f"Refusing to extract '{member.name}' from the archive: {e}")
+      else:
+        if member.name.startswith("/") or ".." in Path(member.name).parts:
+          raise RuntimeError(f"Refusing to extract unsafe path '{member.name}'")
+        tar.extract(member, dest)
+
+    return tar.pax_headers.get("comment")
+
+
+def fetch_archive(slug: str, tag: str, dest: Path) -> str | None:
+  """Streams the GitHub source archive of `tag` straight into dest. Returns the commit if the archive names it."""
+  import requests
+
+  url = f"https://codeload.github.com/{slug}/tar.gz/refs/tags/{tag}"
+
+  with requests.get(url, stream=True, timeout=60) as response:
+    response.raise_for_status()
+    response.raw.decode_content = True
+    return extract_stream(response.raw, dest)
+
+
+def clone_checkout(source: str, tag: str, dest: Path, quiet: bool) -> str:
+  """
+  Shallow-clones `tag` beside dest and exports it into dest with `git archive`, so the tree is the
+  one the GitHub archive holds (export-ignore and export-subst applied) and hashes the same. Returns the commit.
+  """
+  clone = dest.with_name(f".{dest.name}.clone")
+  cmd = ["git", "-c", "advice.detachedHead=false", "clone", "--depth", "1", "--no-checkout", "--branch", tag]
+  if quiet:
+    cmd.append("--quiet")
+  cmd += [repo_url(source), str(clone)]
+  subprocess.run(cmd, check=True)
+
+  try:
+    result = subprocess.run(["git", "rev-parse", "HEAD"], cwd=clone, check=True, capture_output=True, text=True)
+    archive = subprocess.Popen(["git", "archive", "--format=tar.gz", f"--prefix={dest.name}/", "HEAD"], cwd=clone, stdout=subprocess.PIPE)
+    with archive.stdout:
+      extract_stream(archive.stdout, dest)
+    if archive.wait():
+      raise subprocess.CalledProcessError(archive.returncode, archive.args)
+  finally:
+    remove_tree(clone)
+  return result.stdout.strip()
+
+
+def sparse_checkout(source: str, tag: str, dest: Path, patterns: list[str], quiet: bool) -> str:
+  """
+  Clones `tag` without file contents (--filter=blob:none) and checks out only paths matching
+  patterns, so git downloads just those blobs. Returns the commit.
+  """
+  cmd = ["git", "-c", "advice.detachedHead=false", "clone", "--depth", "1", "--filter=blob:none", "--no-checkout", "--branch", tag]
+  if quiet:
+    cmd.append("--quiet")
+  cmd += [repo_url(source), str(dest)]
+  subprocess.run(cmd, check=True)
+
+  # Written directly rather than via `git sparse-checkout`, whose flags changed across git versions
+  subprocess.run(["git", "config", "core.sparseCheckout", "true"], cwd=dest, check=True)
+  (dest / ".git" / "info").mkdir(exist_ok=True)
+  (dest / ".git" / "info" / "sparse-checkout").write_text("\n".join(patterns) + "\n")
+  subprocess.run(["git", "read-tree", "-mu", "HEAD"], cwd=dest, check=True)
+
+  result = subprocess.run(["git", "rev-parse", "HEAD"], cwd=dest, check=True, capture_output=True, text=True)
+  remove_git_dir(dest)
+  return result.stdout.strip()
+
+
+def remove_tree(path: Path):
+  def make_writable(func, path, _):
+    # Git marks pack files read-only, which rmtree cannot delete on Windows
+    Path(path).chmod(stat.S_IWRITE)
+    func(path)
+
+  shutil.rmtree(path, onerror=make_writable)
+
+
+def remove_git_dir(checkout: Path):
+  remove_tree(checkout / ".git")
+
+
+def fetch_manifest(slug: str, tag: str) -> dict | None:
+  """Downloads the cget.json a GitHub package ships at `tag`, or None if it has none."""
+  import requests
+
+  url = f"https://raw.githubusercontent.com/{slug}/{tag}/cget.json"
+
+  response = requests.get(url, timeout=30)
+  if response.status_code == 404:
+    return None
+  response.raise_for_status()
+
+  try:
+    return response.json()
+  except ValueError:
+    return None
+
+
+def fetch_to_store(name: str, source: str, version: str, force: bool, quiet: bool, offline: bool = False, commit: str | None = None, fetch=None) -> Path:
+  """
+  Returns the global store entry for source@version, downloading it only on a cache miss.
+  A known commit (e.g. from the lock file) picks the entry, even one stored under another version name.
+  With a partial `fetch` setting only the selected paths are downloaded; a full entry also serves it.
+  """
+  patterns = sparse_patterns(fetch)
+  variant = fetch_variant(fetch)
+
+  stored = None
+  if not force or offline:
+    # A known commit is authoritative: after a tag moved, the version's ref names other content
+    if commit:
+      stored = store.lookup_commit(source, version, commit, variant) or (variant and store.lookup_commit(source, version, commit))
+    else:
+      stored = store.lookup(source, version, variant) or (variant and store.lookup(source, version))
+  if stored:
+    click.echo(f"Using cached {source}@{version} from {stored}")
+    return stored
+
+  if offline:
+    raise RuntimeError(f"{source}@{version} is not in the package store and --offline was given")
+
+  import tarfile
+
+  tag = find_tag_name(source, version)
+  slug = github_slug(source)
+
+  with store.staging_dir(source) as tmpdir:
+    checkout = Path(tmpdir) / name
+    fetched = None
+
+    if patterns:
+      click.echo(f"Fetching {fetch if isinstance(fetch, str) else ', '.join(fetch)} of {source}@{tag} into package store...")
+      with span("git_sparse_clone", source=source, tag=tag):
+        fetched = sparse_checkout(source, tag, checkout, patterns, quiet)
+    elif slug:
+      try:
+        click.echo(f"Downloading {source}@{tag} archive...")
+        with span("fetch_archive", source=source, tag=tag):
+          fetched = fetch_archive(slug, tag, checkout)
+      except (*NETWORK_ERRORS, tarfile.TarError) as e:
+        click.echo(f"Archive download failed for {source}@{tag} ({e}), falling back to git clone.")
+
+    if not fetched:
+      # Without a commit id the entry cannot be content-addressed, so clone instead
+      remove_path(checkout)
+      click.echo(f"Cloning {source}@{tag} into package store...")
+      with span("git_clone", source=source, tag=tag):
+        fetched = clone_checkout(source, tag, checkout, quiet)
+
+    if commit and fetched != commit:
+      click.echo(f"Warning: tag {tag} of {source} now points at {fetched[:12]}, expected {commit[:12]}")
+
+    with span("store_add", source=source):
+      stored = store.add(source, version, checkout, fetched, replace=force, variant=variant)
+
+  click.echo(f"Package stored at: {stored}")
+  return stored
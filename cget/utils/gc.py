@@ -0,0 +1,87 @@
+from pathlib import Path
+from cget.utils import store
+from cget.utils.misc import remove_path, run_parallel
+
+
+PACKAGES_DIR = Path(".cget_packages")
+# Header indexes and hash caches of copied (not linked) packages sit beside them
+SIDECAR_SUFFIXES = (".headers.json", ".hashes.json")
+
+
+def package_id(filename: str) -> str:
+  """<name>@<version> of a .cget_packages entry or of one of its sidecar files."""
+  for suffix in SIDECAR_SUFFIXES:
+    if filename.endswith(suffix):
+      return filename[:-len(suffix)]
+  return filename
+
+
+def path_size(path: Path) -> int:
+  """Bytes freed by removing path: nothing for a link (the store owns its content), the tree for a copy."""
+  if path.is_symlink():
+    return 0
+  if path.is_dir():
+    return store.dir_size(path)
+  return path.stat().st_size
+
+
+def find_garbage(lock: dict, extern_dirs: list[Path]) -> list[dict]:
+  """
+  Everything in .cget_packages that the lock does not pin, and every extern/ link that dangles or
+  does not point into the locked version of its package. "linked" marks packages living in the store.
+  """
+  keep = {f"{name}@{entry['version']}" for name, entry in lock.items()}
+  garbage = []
+
+  if PACKAGES_DIR.is_dir():
+    for path in sorted(PACKAGES_DIR.iterdir()):
+      if package_id(path.name) not in keep:
+        garbage.append({"path": path, "reason": "not in cget.lock.json", "linked": path.is_symlink()})
+
+  for extern in extern_dirs:
+    if not extern.is_dir():
+      continue
+    for path in sorted(extern.iterdir()):
+      if not path.is_symlink():
+        continue
+      if not path.exists():
+        garbage.append({"path": path, "reason": "dangling link", "linked": False})
+      elif path.name not in lock:
+        garbage.append({"path": path, "reason": "not in cget.lock.json", "linked": False})
+      else:
+        package = (PACKAGES_DIR / f"{path.name}@{lock[path.name]['version']}").resolve()
+        if package != path.resolve() and package not in path.resolve().parents:
+          garbage.append({"path": path, "reason": "points at another version", "linked": False})
+
+  return garbage
+
+
+def collect_garbage(lock: dict, extern_dirs: list[Path], jobs: int, dry_run: bool = False) -> list[dict]:
+  """Removes (or with dry_run only lists) the garbage of find_garbage, recording the bytes each item frees."""
+  garbage = find_garbage(lock, extern_dirs)
+  for item, size in zip(garbage, run_parallel(lambda item: path_size(item["path"]), garbage, jobs)):
+    item["size"] = size
+    if not dry_run:
+      remove_path(item["path"])
+  return garbage
+
+
+def package_usage(lock: dict, jobs: int) -> list[dict]:
+  """Disk usage of every package in .cget_packages, sized in parallel (a linked package is sized in the store)."""
+  if not PACKAGES_DIR.is_dir():
+    return []
+
+  keep = {f"{name}@{entry['version']}" for name, entry in lock.items()}
+  paths = [path for path in sorted(PACKAGES_DIR.iterdir()) if path.is_dir() and package_id(path.name) == path.name]
+  sizes = run_parallel(lambda path: store.dir_size(path.resolve()), paths, jobs)
+
+  return [
+    {
+      "package": path.name,
+      "linked": path.is_symlink(),
+      "target": path.resolve(),
+      "locked": path.name in keep,
+      "size": size
+    }
+    for path, size in zip(paths, sizes)
+  ]
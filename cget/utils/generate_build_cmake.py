@@ -1,6 +1,11 @@
 import click
 import platform
+from pathlib import Path
 from cget.utils.misc import load_lock
+from cget.utils.compiler_cache import generate_compiler_cache
+from cget.utils.pch import generate_precompiled_headers
+from cget.utils.prebuilt import generate_cpm_source_cache, generate_prebuilt_function, generate_prebuilt_package, package_key
+from cget.utils.trace import traced
 
 
 def generate_compiler_options(options: dict) -> str:
@@ -25,16 +30,62 @@ def generate_compiler_options(options: dict) -> str:
   return "\n".join(lines)
 
 
-def generate_build_cmake(deps: list[dict] | None, deps_path: str, compiler_options: dict):
+def generate_unity_build(batch_size: int | None) -> str:
+  """Unity builds for the project's own targets; the dependencies above were already added without."""
+  lines = [
+    "# start of unity build",
+    "set(CMAKE_UNITY_BUILD ON)"
+  ]
+  if batch_size:
+    lines.append(f"set(CMAKE_UNITY_BUILD_BATCH_SIZE {batch_size})")
+  lines.append("# end of unity build")
+  return "\n".join(lines)
+
+
+def write_if_changed(path: Path, content: str) -> bool:
+  """Writes content unless the file already holds it, so CMake does not see a new timestamp."""
+  if path.exists() and path.read_text() == content:
+    return False
+
+  path.write_text(content)
+  return True
+
+
+def dependency_order(lock: dict) -> list[str]:
+  """Lock entries with every package after the packages it depends on."""
+  ordered = []
+  visiting = set()
+
+  def visit(name):
+    if name in ordered or name in visiting or name not in lock:
+      return
+    visiting.add(name)
+    for dep in lock[name].get("dependencies", []):
+      visit(dep)
+    ordered.append(name)
+
+  for name in lock:
+    visit(name)
+  return ordered
+
+
+@traced("generate_build_cmake")
+def generate_build_cmake(deps: list[dict] | None, deps_path: Path, compiler_options: dict, compiler_cache: dict | None = None, prebuilt: bool = False, precompiled_headers: list[dict] | None = None, unity_build: bool = False, unity_batch_size: int | None = None) -> bool:
   lines = [
     "# Auto-generated by cget build",
+    "# Workspace members include this again; they inherit everything it sets from the top level",
+    "include_guard(GLOBAL)",
     "include(cmake/CPM.cmake)",
     "",
+    generate_cpm_source_cache(),
+    "",
     "# start of dependencies",
     "set(DEPENDENCY_LIBS)",
     "set(MACROS)"
   ]
-  
+  if compiler_cache:
+    lines.insert(lines.index("# start of dependencies"), generate_compiler_cache(compiler_cache) + "\n")
+
   if not deps:
     click.echo("No dependencies listed in cget.json")
   else:
@@ -43,25 +94,40 @@ def generate_build_cmake(deps: list[dict] | None, deps_path: str, compiler_optio
     current_platform = platform.system().lower()
 
     lock = load_lock()
+    if prebuilt:
+      lines.insert(lines.index("# start of dependencies"), generate_prebuilt_function() + "\n")
 
-    for name, dep in lock.items():
+    for name in dependency_order(lock):
+      dep = lock[name]
       if "platforms" in dep and dep["platforms"] and current_platform not in dep["platforms"]:
         continue
 
       version = dep.get("version")
 
-      lines.append("CPMAddPackage(")
-      lines.append(f"  NAME {name}")
-      lines.append(f"  VERSION {version}")
-      lines.append(f'  SOURCE_DIR "${{CMAKE_SOURCE_DIR}}/.cget_packages/{name}@{version}"')
-      lines.append(")\n")
+      if prebuilt:
+        lines.append(generate_prebuilt_package(name, version, package_key(name, lock, compiler_options), compiler_options))
+      else:
+        lines.append("CPMAddPackage(")
+        lines.append(f"  NAME {name}")
+        lines.append(f"  VERSION {version}")
+        lines.append(f'  SOURCE_DIR "${{CMAKE_SOURCE_DIR}}/.cget_packages/{name}@{version}"')
+        lines.append(")\n")
 
       lines.append(f"list(APPEND DEPENDENCY_LIBS {name}::{name})")
       lines.append(f"list(APPEND MACROS HAS_{name.capitalize()})")
 
     lines.append("# end of dependencies")
 
-  with open(deps_path, "w") as f:
-    f.write("\n".join(lines) + generate_compiler_options(compiler_options))
+  if unity_build:
+    lines.append("\n" + generate_unity_build(unity_batch_size))
+  if precompiled_headers:
+    lines.append("\n" + generate_precompiled_headers(precompiled_headers))
+
+  content = "\n".join(lines) + generate_compiler_options(compiler_options)
+
+  if write_if_changed(deps_path, content):
+    click.echo("_dependencies.cmake generated.")
+    return True
 
-  click.echo("_dependencies.cmake generated.")
\ No newline at end of file
+  click.echo("_dependencies.cmake is up to date.")
+  return False
\ No newline at end of file
@@ -0,0 +1,114 @@
+import hashlib
+import os
+import stat
+import time
+from pathlib import Path
+from cget.utils.cache import read_json, write_json_atomic
+from cget.utils.misc import run_parallel
+
+
+CHUNK_SIZE = 1024 * 1024
+HASH_CACHE_VERSION = 1
+# A file written this recently can change again within the same mtime tick, so its hash is not cached
+RACY_WINDOW_NS = 2 * 10**9
+
+
+def hash_bytes(data: bytes) -> str:
+  return hashlib.sha256(data).hexdigest()
+
+
+def hash_file(path: Path) -> str:
+  """sha256 of a file's contents, read in chunks (hashlib releases the GIL, so threads hash in parallel)."""
+  digest = hashlib.sha256()
+  with open(path, "rb") as f:
+    for chunk in iter(lambda: f.read(CHUNK_SIZE), b""):
+      digest.update(chunk)
+  return digest.hexdigest()
+
+
+def hash_cache_path(package_dir: Path) -> Path:
+  """Like the header index, the stat cache lives beside the package (beside its store entry when linked)."""
+  package_dir = package_dir.resolve()
+  return package_dir.parent / f"{package_dir.name}.hashes.json"
+
+
+def remove_hash_cache(package_dir: Path):
+  path = hash_cache_path(package_dir)
+  if path.exists():
+    path.unlink()
+
+
+def scan_tree(root: Path) -> tuple[dict[str, os.stat_result], dict[str, str]]:
+  """Regular files (relative path -> stat) and symlinks (relative path -> target) under root, skipping .git."""
+  files = {}
+  links = {}
+  for current, dirnames, filenames in os.walk(root):
+    dirnames[:] = [d for d in dirnames if d != ".git"]
+    for name in dirnames + filenames:
+      path = Path(current) / name
+      relative = path.relative_to(root).as_posix()
+      if path.is_symlink():
+        links[relative] = os.readlink(path)
+      elif name in filenames:
+        files[relative] = path.stat()
+  return files, links
+
+
+def tree_digest(files: dict[str, tuple[str, int]], links: dict[str, str]) -> str:
+  """Hash of a whole tree: every path with its content hash and mode, every symlink with its target."""
+  digest = hashlib.sha256()
+  for relative in sorted(files):
+    sha, mode = files[relative]
+    digest.update(f"F {relative} {sha} {mode:o}\n".encode())
+  for relative in sorted(links):
+    digest.update(f"L {relative} {links[relative]}\n".encode())
+  return f"sha256:{digest.hexdigest()}"
+
+
+def hash_trees(roots: list[Path], jobs: int, use_cache: bool = True) -> list[dict]:
+  """
+  Hashes the trees under roots with one pool of `jobs` threads shared by all of them. A file whose
+  size, mtime and inode match the stat cache is not read again. Each result has the tree "hash",
+  "files" (relative path -> (sha256, mode)), "links" and "hashed", the number of files actually read.
+  """
+  scans = [scan_tree(root) for root in roots]
+  caches = []
+  misses = []
+  counts = []
+  for root, (files, _) in zip(roots, scans):
+    cache = read_json(hash_cache_path(root)) if use_cache else None
+    cached = cache["files"] if cache and cache.get("version") == HASH_CACHE_VERSION else {}
+    caches.append(cached)
+    for relative, st in files.items():
+      known = cached.get(relative)
+      if not known or known[:3] != [st.st_size, st.st_mtime_ns, st.st_ino]:
+        misses.append((root, relative))
+    counts.append(len(misses) - sum(counts))
+
+  hashes = dict(zip(misses, run_parallel(lambda miss: hash_file(miss[0] / miss[1]), misses, jobs)))
+
+  now = time.time_ns()
+  results = []
+  for root, (files, links), cached, count in zip(roots, scans, caches, counts):
+    entries = {}
+    cache = {}
+    for relative, st in files.items():
+      sha = hashes.get((root, relative)) or cached[relative][3]
+      entries[relative] = (sha, 0o755 if st.st_mode & stat.S_IXUSR else 0o644)
+      if now - st.st_mtime_ns > RACY_WINDOW_NS:
+        cache[relative] = [st.st_size, st.st_mtime_ns, st.st_ino, sha]
+
+    if cache != cached:
+      try:
+        write_json_atomic(hash_cache_path(root), {"version": HASH_CACHE_VERSION, "files": cache})
+      except OSError:
+        pass
+
+    results.append({
+      "hash": tree_digest(entries, links),
+      "files": entries,
+      "links": links,
+      "hashed": count
+    })
+
+  return results
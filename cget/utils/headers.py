@@ -0,0 +1,105 @@
+import os
+from pathlib import Path
+from cget.utils.cache import read_json, write_json_atomic
+
+
+HEADER_EXTENSIONS = {".h", ".hh", ".hpp", ".hxx", ".h++", ".inl", ".ipp", ".tpp"}
+SKIP_DIRS = {".git", ".github", "build", "__pycache__"}
+INDEX_VERSION = 1
+
+
+def index_path(package_dir: Path) -> Path:
+  """The index lives beside the package (beside its store entry when the package is linked)."""
+  package_dir = package_dir.resolve()
+  return package_dir.parent / f"{package_dir.name}.headers.json"
+
+
+def scan_headers(package_dir: Path) -> dict:
+  """Walks package_dir once and records every header, the extensions used and the directories holding them."""
+  headers = []
+  extensions: dict[str, int] = {}
+  directories = set()
+
+  for root, dirnames, filenames in os.walk(package_dir):
+    dirnames[:] = [d for d in dirnames if d not in SKIP_DIRS]
+    rel_root = Path(root).relative_to(package_dir).as_posix()
+
+    for filename in filenames:
+      ext = os.path.splitext(filename)[1].lower()
+      if ext not in HEADER_EXTENSIONS:
+        continue
+
+      headers.append(filename if rel_root == "." else f"{rel_root}/{filename}")
+      extensions[ext] = extensions.get(ext, 0) + 1
+
+      # Every ancestor of a header directory "contains headers" for include root purposes
+      parts = [] if rel_root == "." else rel_root.split("/")
+      for i in range(len(parts) + 1):
+        directories.add("/".join(parts[:i]) or ".")
+
+  return {
+    "version": INDEX_VERSION,
+    "headers": sorted(headers),
+    "extensions": extensions,
+    "directories": sorted(directories)
+  }
+
+
+def cached_header_index(package_dir: Path) -> dict | None:
+  index = read_json(index_path(package_dir))
+  return index if isinstance(index, dict) and index.get("version") == INDEX_VERSION else None
+
+
+def load_header_index(package_dir: Path, rebuild: bool = False) -> dict:
+  """Returns the persisted header index of a package, scanning it on first use."""
+  index = None if rebuild else cached_header_index(package_dir)
+  if index:
+    return index
+
+  index = scan_headers(package_dir)
+  try:
+    write_json_atomic(index_path(package_dir), index)
+  except OSError:
+    pass
+  return index
+
+
+def remove_header_index(package_dir: Path):
+  path = index_path(package_dir)
+  if path.exists():
+    path.unlink()
+
+
+def has_header(directory: Path) -> bool:
+  """Whether any header lies under directory, stopping the walk at the first one."""
+  for root, dirnames, filenames in os.walk(directory):
+    dirnames[:] = [d for d in dirnames if d not in SKIP_DIRS]
+    if any(os.path.splitext(filename)[1].lower() in HEADER_EXTENSIONS for filename in filenames):
+      return True
+  return False
+
+
+def find_include_root(dest_dir: Path, name: str) -> Path:
+  """
+  Tries to find the correct subdirectory in dest_dir to symlink as the include path.
+  Prefers: <dest_dir>/include/<name>, <dest_dir>/<name>, or just <dest_dir> itself if it contains headers.
+  Answers from the header index when one exists; otherwise only walks until a candidate shows a header.
+  """
+  index = cached_header_index(dest_dir)
+  directories = set(index["directories"]) if index else None
+
+  for candidate in [f"include/{name}", name, "include", "."]:
+    found = candidate in directories if index else has_header(dest_dir / candidate)
+    if found:
+      return dest_dir if candidate == "." else dest_dir / candidate
+
+  raise RuntimeError(f"Could not find a valid include path in {dest_dir}")
+
+
+def include_root_headers(package_dir: Path, include_root: Path) -> set[str]:
+  """Headers of a package as included through include_root, e.g. 'fmt/core.h' for include/ of fmt."""
+  prefix = include_root.resolve().relative_to(package_dir.resolve()).as_posix()
+  headers = load_header_index(package_dir)["headers"]
+  if prefix == ".":
+    return set(headers)
+  return {header[len(prefix) + 1:] for header in headers if header.startswith(prefix + "/")}
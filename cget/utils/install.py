@@ -1,20 +1,23 @@
 import click
-import json
 import shutil
-import tempfile
-import subprocess
 import os
 from pathlib import Path
-from cget.utils.misc import save_lock, load_lock, find_best_tag, find_include_root
+from packaging.specifiers import InvalidSpecifier
+from packaging.version import Version, InvalidVersion
+from cget.utils import store
+from cget.utils.fetch import fetch_to_store, fetch_variant
+from cget.utils.hashing import hash_trees, remove_hash_cache
+from cget.utils.headers import find_include_root, remove_header_index
+from cget.utils.resolver import resolve_dependencies, parse_requirement, to_specifier, ResolutionError
+from cget.utils.misc import Transaction, find_tag_commit, run_parallel, remove_path, NETWORK_ERRORS
+from cget.utils.sources import split_source, default_name, repo_url
+from cget.utils.trace import span
 
 
 def parse_source_and_version(source: str) -> tuple[str, str]:
-  version = None
-  if "@" in source:
-    source, version = source.split("@", 1)
+  source, version = split_source(source)
 
-  _, repo = source.split("/", 1)
-  name = repo
+  name = default_name(source)
   version = version or "latest"
   
   return (name, version)
@@ -53,12 +56,6 @@ def check_for_existing_dependency(data: dict, name: str, dev: bool) -> tuple[dic
   return None, False
 
 
-def save_project_file(data: dict, existing: dict, name: str, version: str):
-  with open("cget.json", "w") as f:
-    json.dump(data, f, indent=2)
-  click.echo(f"{'Updated' if existing else 'Added'} {name}@{version}")
-
-
 def update_or_add_dependency(data: dict, dep: dict, dev: bool) -> bool:
   section, _, deps, other_deps = prepare_dependency_sections(data, dev)
 
@@ -77,40 +74,47 @@ def update_or_add_dependency(data: dict, dep: dict, dev: bool) -> bool:
     else:
       click.echo(f"Updated existing dependency '{name}' in '{section}'.")
     
-    save_project_file(data, existing, name, version)
+    click.echo(f"Updated {name}@{version}")
     return False
   else:
     deps.append(dep)
     click.echo(f"Added new dependency '{name}' to '{section}'.")
 
-    save_project_file(data, existing, name, version)
+    click.echo(f"Added {name}@{version}")
     return True
 
 
-def download_package(name: str, source: str, version: str, updated: bool, force: bool) -> bool:
+def link_package(stored: Path, dest_dir: Path):
+  """Points .cget_packages/<name>@<version> at a store entry, copying where symlinks are unavailable."""
+  dest_dir.parent.mkdir(parents=True, exist_ok=True)
+  try:
+    os.symlink(stored, dest_dir, target_is_directory=True)
+  except OSError:
+    shutil.copytree(stored, dest_dir)
+  store.touch(stored)
+
+
+def download_package(name: str, source: str, version: str, updated: bool, force: bool, quiet: bool = False, offline: bool = False, commit: str | None = None, fetch=None) -> bool:
   header_path = Path("extern") / name
 
   dest_dir = Path(".cget_packages") / f"{name}@{version}"
 
   if force or updated or not header_path.exists() or not dest_dir.exists():
-    if dest_dir.exists():
-      shutil.rmtree(dest_dir)
+    remove_package_dir(dest_dir)
 
-    with tempfile.TemporaryDirectory() as tmpdir:
-      click.echo(f"Cloning {source}@{version} into temporary directory...")
-      subprocess.run([
-        "git", "clone", "--depth", "1", "--branch", version, f"https://github.com/{source}.git"
-      ], cwd=tmpdir, check=True)
-
-      source_dir = Path(tmpdir) / name
-      shutil.copytree(source_dir, dest_dir)
-      click.echo(f"Package copied to: {dest_dir}")
+    with span("fetch_to_store", package=name):
+      stored = fetch_to_store(name, source, version, force, quiet, offline, commit, fetch)
+    with span("link_package", package=name):
+      link_package(stored, dest_dir)
+    click.echo(f"Package linked at: {dest_dir}")
 
     try:
-      dest_dir = find_include_root(dest_dir, name)
+      with span("find_include_root", package=name):
+        dest_dir = find_include_root(dest_dir, name)
       if header_path.exists() or header_path.is_symlink():
         header_path.unlink()
         
+      header_path.parent.mkdir(exist_ok=True)
       os.symlink(dest_dir.resolve(), header_path)
       click.echo(f"Created symlink: {header_path} -> {dest_dir}")
       return True
@@ -122,19 +126,227 @@ def download_package(name: str, source: str, version: str, updated: bool, force:
     return True
 
   
-def update_lock_file(name: str, source: str, version: str, platforms: list[str] = None):
-  lock = load_lock()
-  lock[name] = {
-      "name": name,
-      "source": source,
-      "resolved": f"https://github.com/{source}.git", # optional, you can use latest tag or fake
-      "version": version,
-      "platforms": platforms
+def make_lock_entry(name: str, source: str, version: str, platforms: list[str] = None, commit: str | None = None, fetch=None) -> dict:
+  entry = {
+    "name": name,
+    "source": source,
+    "resolved": repo_url(source),
+    "version": version,
+    "platforms": platforms
   }
-  save_lock(lock)
+  if commit:
+    entry["commit"] = commit
+  if fetch_variant(fetch):
+    entry["fetch"] = fetch
+  return entry
+
+
+def build_lock(solution: dict, data: dict, lock: dict, follow_tags: bool = False) -> dict:
+  """
+  Turns a resolver solution into cget.lock.json entries, keeping platforms from cget.json.
+  A version that stays locked keeps its commit unless follow_tags asks for where the tag points now.
+  """
+  platforms = {}
+  for dep in data.get("dependencies", []) + data.get("devDependencies", []):
+    platforms[parse_requirement(dep)[0]] = dep.get("platforms")
+
+  new_lock = {}
+  for name, node in solution.items():
+    old = lock.get(name, {})
+    unchanged = old.get("source") == node["source"] and old.get("version") == node["version"]
+    commit = old.get("commit") if unchanged and not follow_tags else None
+    commit = commit or find_tag_commit(node["source"], node["version"])
+    entry = make_lock_entry(name, node["source"], node["version"], platforms.get(name, old.get("platforms")), commit, node.get("fetch"))
+    entry["dependencies"] = node["dependencies"]
+    if old.get("source") == entry["source"] and old.get("version") == entry["version"]:
+      entry = {**old, **entry}
+      if not fetch_variant(node.get("fetch")):
+        entry.pop("fetch", None)
+      if old.get("commit") != entry.get("commit") or fetch_variant(old.get("fetch")) != fetch_variant(entry.get("fetch")):
+        # A moved tag or different partial fetch installs other content
+        entry.pop("hash", None)
+    new_lock[name] = entry
+
+  return new_lock
+
+
+def plan_update(old_lock: dict, new_lock: dict) -> list[dict]:
+  """
+  Compares a freshly resolved lock with the current one. Each step has the package name, old and
+  new entries, and an action: add, upgrade, downgrade, retag (same version, tag moved), reinstall
+  (unchanged but missing on disk), unchanged or remove.
+  """
+  steps = []
+  for name in sorted(set(old_lock) | set(new_lock)):
+    old, new = old_lock.get(name), new_lock.get(name)
+
+    if new is None:
+      action = "remove"
+    elif old is None or old.get("source") != new["source"]:
+      action = "add"
+    elif old["version"] != new["version"]:
+      try:
+        action = "upgrade" if Version(new["version"]) > Version(old["version"]) else "downgrade"
+      except InvalidVersion:
+        action = "upgrade"
+    elif old.get("commit") and new.get("commit") and old["commit"] != new["commit"]:
+      action = "retag"
+    elif fetch_variant(old.get("fetch")) != fetch_variant(new.get("fetch")):
+      action = "reinstall"
+    elif not (Path(".cget_packages") / f"{name}@{new['version']}").exists() or not (Path("extern") / name).exists():
+      action = "reinstall"
+    else:
+      action = "unchanged"
+
+    steps.append({"name": name, "action": action, "old": old, "new": new})
+
+  return steps
+
+
+def remove_package_dir(path: Path):
+  """Removes .cget_packages/<name>@<version>; a copied package takes its header index and hash cache along."""
+  if path.is_dir() and not path.is_symlink():
+    remove_header_index(path)
+    remove_hash_cache(path)
+  remove_path(path)
+
+
+def unlink_package(name: str, version: str, header: bool = True):
+  """Removes a package's project links (never its store entry), optionally keeping extern/<name>."""
+  remove_package_dir(Path(".cget_packages") / f"{name}@{version}")
+  header_path = Path("extern") / name
+  if header and header_path.is_symlink():
+    header_path.unlink()
+
+
+def record_commits(lock: dict):
+  """
+  Records the commit of the store entry each package actually links, dropping a hash recorded for
+  other content. Copied packages only get a commit the lock is missing, from the package store.
+  """
+  for entry in lock.values():
+    package_path = Path(".cget_packages") / f"{entry['name']}@{entry['version']}"
+    if package_path.is_symlink():
+      linked = store.entry_commit(package_path.resolve())
+      if entry.get("commit") != linked:
+        entry["commit"] = linked
+        entry.pop("hash", None)
+    elif not entry.get("commit"):
+      stored = store.lookup(entry["source"], entry["version"], fetch_variant(entry.get("fetch")))
+      if stored:
+        entry["commit"] = store.entry_commit(stored)
+
+
+def record_hashes(lock: dict, jobs: int = 1):
+  """Records the tree hash of every installed package whose lock entry has none yet."""
+  pending = [entry for entry in lock.values() if not entry.get("hash") and (Path(".cget_packages") / f"{entry['name']}@{entry['version']}").is_dir()]
+  if not pending:
+    return
+
+  with span("record_hashes", packages=len(pending)):
+    trees = hash_trees([Path(".cget_packages") / f"{entry['name']}@{entry['version']}" for entry in pending], jobs)
+  for entry, tree in zip(pending, trees):
+    entry["hash"] = tree["hash"]
+
+
+def verify_packages(lock: dict, jobs: int = 1, use_cache: bool = True) -> list[dict]:
+  """
+  Checks installed packages against the tree hashes in the lock. Each result has the package name,
+  version and a status: ok, modified, missing or unhashed (locked before hashes were recorded).
+  """
+  results = []
+  present = []
+  for name, entry in sorted(lock.items()):
+    package_path = Path(".cget_packages") / f"{name}@{entry['version']}"
+    result = {"name": name, "version": entry["version"], "status": "ok", "hashed": 0}
+    if not package_path.is_dir():
+      result["status"] = "missing"
+    elif not entry.get("hash"):
+      result["status"] = "unhashed"
+    else:
+      present.append((result, package_path))
+    results.append(result)
+
+  with span("verify_packages", packages=len(present)):
+    trees = hash_trees([path for _, path in present], jobs, use_cache)
+  for (result, _), tree in zip(present, trees):
+    result["hashed"] = tree["hashed"]
+    if tree["hash"] != lock[result["name"]]["hash"]:
+      result["status"] = "modified"
+
+  return results
+
+
+def lock_closure(lock: dict, names: list[str]) -> dict:
+  """
+  Returns the locked entries reachable from names through their recorded dependencies. Names missing
+  from the lock are skipped; a recorded dependency without an entry of its own raises ValueError.
+  """
+  reachable = {}
+  stack = [(name, None) for name in names]
+  while stack:
+    name, parent = stack.pop()
+    if name in reachable:
+      continue
+    if name not in lock:
+      if parent:
+        raise ValueError(f"'{parent}' depends on '{name}', which has no entry in cget.lock.json")
+      continue
+    reachable[name] = lock[name]
+    stack.extend((dep, name) for dep in lock[name].get("dependencies", []))
+
+  return reachable
+
+
+def link_outdated(package_path: Path, entry: dict) -> bool:
+  """
+  True if package_path links another commit than the lock entry pins, or a partial checkout other
+  than the one its "fetch" asks for (a full one serves any).
+  """
+  if not package_path.is_symlink():
+    return False
+  linked = Path(os.readlink(package_path))
+  if entry.get("commit") and store.entry_commit(linked) != entry["commit"]:
+    return True
+  variant = store.entry_variant(linked)
+  return variant is not None and variant != fetch_variant(entry.get("fetch"))
+
+
+def install_package(entry: dict, force: bool, quiet: bool, offline: bool = False) -> tuple[str, str]:
+  """Installs one resolved lock entry. Returns (name, status)."""
+  name = entry["name"]
+  source = entry["source"]
+  version = entry["version"]
+
+  with span("install_package", source=source, version=version):
+    try:
+      header_path = Path("extern") / name
+      package_path = Path(".cget_packages") / f"{name}@{version}"
+
+      if not force and package_path.exists() and header_path.exists() and not link_outdated(package_path, entry):
+        click.echo(f"-> Skipping '{name}' (already installed)")
+        return name, "skipped"
+
+      click.echo(f"-> Installing '{name}' from {source}...")
+
+      if not download_package(name, source, version, True, force, quiet, offline, entry.get("commit"), entry.get("fetch")):
+        return name, "failed"
+    except Exception as e:
+      click.echo(f"-> Failed to install '{name}': {e}")
+      return name, "failed"
 
+    click.echo(f"-> Installed '{name}@{version}'")
+    return name, "installed"
 
-def install_dependency(source: str, platforms: str | None, dev: bool, data: dict, force: bool) -> bool:
+
+def parse_fetch(fetch: str | None):
+  """--fetch value -> cget.json "fetch" setting: "full", "headers" or a list of paths."""
+  if fetch is None or fetch in ("full", "headers"):
+    return fetch
+  return [path.strip() for path in fetch.split(",") if path.strip()]
+
+
+def install_dependency(source: str, platforms: str | None, dev: bool, transaction: Transaction, force: bool, fetch: str | None = None) -> bool:
   if "/" not in source:
     click.echo("Error: Dependency must be in 'user/repo' format.")
     return False
@@ -142,51 +354,123 @@ def install_dependency(source: str, platforms: str | None, dev: bool, data: dict
   name, version = parse_source_and_version(source)
   parsed_platforms = parse_platforms(platforms)
 
-  updated = update_or_add_dependency(data, {
+  dep = {
     "name": name,
     "source": source,
     "version": version,
     "platforms": parsed_platforms
-  }, dev)
+  }
+  if fetch:
+    dep["fetch"] = parse_fetch(fetch)
+
+  data = transaction.manifest
+  update_or_add_dependency(data, dep, dev)
+
+  # Forget the old pin so the requested range is resolved afresh
+  lock = {key: entry for key, entry in transaction.lock.items() if key != name}
+
+  try:
+    dependencies = data.get("dependencies", []) + data.get("devDependencies", [])
+    new_lock = build_lock(resolve_dependencies(dependencies, lock), data, lock)
+  except (ResolutionError, *NETWORK_ERRORS) as e:
+    click.echo(f"Error: {e}")
+    # Leave cget.json without a dependency that cannot be resolved
+    transaction.rollback()
+    return False
 
-  version = find_best_tag(source, version)
+  success = True
+  for entry in new_lock.values():
+    _, status = install_package(entry, force and entry["name"] == name, False)
+    success = success and status != "failed"
 
-  if not download_package(name, source, version, updated, force):
-    return False
+  record_commits(new_lock)
+  record_hashes(new_lock)
+  transaction.lock = new_lock
+  return success
+
+
+def check_lock_matches(data: dict, lock: dict) -> list[str]:
+  """Lists every way the manifest disagrees with cget.lock.json."""
+  problems = []
+
+  for dep in data.get("dependencies", []) + data.get("devDependencies", []):
+    name, _, version = parse_requirement(dep)
+    locked = lock.get(name)
+
+    if not locked:
+      problems.append(f"'{name}' is in cget.json but not in cget.lock.json")
+      continue
+
+    if split_source(locked["source"])[0] != split_source(dep["source"])[0]:
+      problems.append(f"'{name}' is locked to source '{locked['source']}' but cget.json uses '{dep['source']}'")
+      continue
+
+    if fetch_variant(dep.get("fetch")) != fetch_variant(locked.get("fetch")):
+      problems.append(f"'{name}' is locked with fetch {locked.get('fetch', 'full')!r} but cget.json uses {dep.get('fetch', 'full')!r}")
+      continue
+
+    if version == "latest":
+      continue
+    try:
+      # Same reading as the resolver, so a bare pin like "1.1.0" means ==1.1.0
+      if Version(locked["version"]) not in to_specifier(version):
+        problems.append(f"'{name}' is locked to {locked['version']} which does not satisfy '{version}'")
+    except (InvalidSpecifier, InvalidVersion):
+      problems.append(f"'{name}' is locked to {locked['version']} which cannot be checked against '{version}'")
 
-  update_lock_file(name, source, version)
-  return True
+  for name, entry in sorted(lock.items()):
+    for dep in entry.get("dependencies", []):
+      if dep not in lock:
+        problems.append(f"'{name}' depends on '{dep}', which has no entry in cget.lock.json")
 
+  return problems
 
-def install_all(data: dict, force: bool = False) -> bool:
+
+def install_all(transaction: Transaction, force: bool = False, jobs: int = 1, frozen: bool = False, offline: bool = False, data: dict | None = None) -> tuple[int, bool]:
+  """
+  Installs the dependencies of `data` (default: the transaction's cget.json) and locks them in the
+  transaction. Returns (packages installed, False if resolution or any package failed).
+  """
   click.echo("Installing all dependencies from cget.lock.json...")
 
+  data = data or transaction.manifest
   dependencies = data.get("dependencies", []) + data.get("devDependencies", [])
   if not dependencies:
-    return 0
-  
-  installed_count = 0
-  lock = load_lock()
-  for dep in dependencies:
-    source = dep["source"]
-    name, version = parse_source_and_version(source)
-    version = find_best_tag(source, version)
-    locked = lock.get(name)
-    if locked:
-        source = locked["source"]
-        version = locked["version"]
+    return 0, True
 
-    header_path = Path("extern") / name
-    package_path = Path(".cget_packages") / f"{name}@{version}"
-
-    if not force and package_path.exists() and header_path.exists():
-      click.echo(f"-> Skipping '{name}' (already installed)")
-      continue
+  lock = transaction.lock
+  if frozen:
+    try:
+      entries = lock_closure(lock, [parse_requirement(dep)[0] for dep in dependencies])
+    except ValueError as e:
+      click.echo(f"Error: {e}")
+      return 0, False
+  else:
+    try:
+      entries = build_lock(resolve_dependencies(dependencies, lock, jobs), data, lock)
+    except (ResolutionError, *NETWORK_ERRORS) as e:
+      click.echo(f"Error: {e}")
+      return 0, False
 
-    click.echo(f"-> Installing '{name}' from {source}...")
+  results = run_parallel(
+    lambda entry: install_package(entry, force, jobs > 1, offline),
+    list(entries.values()),
+    jobs
+  )
 
-    if not download_package(name, source, version, True, force):
-      return installed_count
-    installed_count += 1
-  
-  return installed_count
\ No newline at end of file
+  installed_count = 0
+  success = True
+  for name, status in results:
+    if status == "installed":
+      installed_count += 1
+    elif status == "failed":
+      click.echo(f"Failed to install '{name}'")
+      success = False
+
+  # A frozen install never rewrites the lock, not even to fill in commits
+  if not frozen:
+    record_commits(entries)
+    record_hashes(entries, jobs)
+    transaction.lock = entries
+
+  return installed_count, success
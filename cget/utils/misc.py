@@ -1,39 +1,135 @@
 import click
 import json
 import os
-import requests
+import math
+import time
+import shutil
+import subprocess
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
 from pathlib import Path
 from packaging.specifiers import SpecifierSet
 from packaging.version import Version, InvalidVersion
+from cget.utils.cache import load_tag_cache, save_tag_cache, is_fresh, write_json_atomic
+from cget.utils.sources import get_backend
+from cget.utils.trace import span
 
 
-def validate_project_root() -> dict:
+# requests exceptions derive from OSError, failed git commands raise CalledProcessError
+NETWORK_ERRORS = (OSError, subprocess.CalledProcessError)
+
+
+def get_cgroup_cpu_limit() -> int | None:
+  """Reads the container CPU quota (cgroup v2, then v1), rounded up to whole CPUs."""
+  try:
+    quota, period = Path("/sys/fs/cgroup/cpu.max").read_text().split()
+    if quota == "max":
+      return None
+    return max(1, math.ceil(int(quota) / int(period)))
+  except (OSError, ValueError):
+    pass
+
+  try:
+    quota = int(Path("/sys/fs/cgroup/cpu/cpu.cfs_quota_us").read_text())
+    period = int(Path("/sys/fs/cgroup/cpu/cpu.cfs_period_us").read_text())
+    if quota <= 0 or period <= 0:
+      return None
+    return max(1, math.ceil(quota / period))
+  except (OSError, ValueError):
+    return None
+
+
+def get_cpu_count() -> int:
+  if hasattr(os, "sched_getaffinity"):
+    count = len(os.sched_getaffinity(0))
+  else:
+    count = os.cpu_count() or 1
+
+  limit = get_cgroup_cpu_limit()
+  return min(count, limit) if limit else count
+
+
+def run_parallel(func, items: list, jobs: int) -> list:
+  """Maps func over items with at most `jobs` worker threads, preserving order."""
+  if jobs <= 1 or len(items) <= 1:
+    return [func(item) for item in items]
+
+  with ThreadPoolExecutor(max_workers=min(jobs, len(items))) as pool:
+    return list(pool.map(func, items))
+
+
+def validate_project_root() -> bool:
   if not os.path.exists("cget.json"):
     click.echo("Error: cget.json not found. Run `cget init` first.")
     return False
 
-  with open("cget.json", "r") as f:
-    data = json.load(f)
-  
-  return data
+  return True
+
+
+def build_version_index(tags: list[str]) -> list[list[str]]:
+  """Parses tags once into a list of [version, tag] pairs sorted newest first."""
+  parsed = []
+  for tag in tags:
+    try:
+      parsed.append((Version(tag.lstrip('v')), tag))
+    except InvalidVersion:
+      continue
 
+  parsed.sort(key=lambda item: item[0], reverse=True)
+  return [[str(version), tag] for version, tag in parsed]
 
-def get_github_tags(source) -> list[str]:
-  """Fetch all git tags from GitHub repo 'user/repo'."""
-  url = f"https://api.github.com/repos/{source}/tags"
-  tags = []
-  page = 1
 
-  while True:
-    response = requests.get(url, params={"per_page": 100, "page": page})
-    response.raise_for_status()
-    data = response.json()
-    if not data:
-      break
-    tags.extend([tag["name"] for tag in data])
-    page += 1
-    
-  return tags
+def load_tag_entry(source: str) -> dict:
+  """Returns the cached tag entry for source, revalidating it with the source backend once its TTL expires."""
+  backend = get_backend()
+  entry = load_tag_cache(source)
+  same_backend = entry is not None and entry.get("backend") == backend.name and "commits" in entry
+  if same_backend and is_fresh(entry):
+    return entry
+
+  try:
+    with span("fetch_tags", source=source, backend=backend.name):
+      commits, validator = backend.fetch_tags(source, entry.get("validator") if same_backend else None)
+  except NETWORK_ERRORS as e:
+    if entry:
+      click.echo(f"Warning: could not refresh tags for {source} ({e}), using cached tags.")
+      return entry
+    raise
+
+  if commits is None:
+    entry["fetched"] = time.time()
+  else:
+    entry = {
+      "backend": backend.name,
+      "validator": validator,
+      "fetched": time.time(),
+      "tags": list(commits),
+      "commits": commits,
+      "versions": build_version_index(list(commits))
+    }
+
+  save_tag_cache(source, entry)
+  return entry
+
+
+def get_tags(source: str) -> list[str]:
+  """All git tags of source, served from the tag cache when possible."""
+  return load_tag_entry(source)["tags"]
+
+
+_version_indexes: dict[str, list] = {}
+
+
+def get_version_index(source: str) -> list[tuple[Version, str]]:
+  """Returns the (Version, tag) index of source sorted newest first, parsed once per process."""
+  if source not in _version_indexes:
+    entry = load_tag_entry(source)
+    versions = entry.get("versions")
+    if versions is None:
+      versions = build_version_index(entry["tags"])
+    _version_indexes[source] = [(Version(version), tag) for version, tag in versions]
+
+  return _version_indexes[source]
 
 
 def find_best_tag(source: str, version_range: str):
@@ -43,26 +139,135 @@ def find_best_tag(source: str, version_range: str):
 
   spec = SpecifierSet(version_range)
 
-  candidate_versions = []
-  for tag in get_github_tags(source):
-      clean_tag = tag.lstrip('v')
+  with span("find_best_tag", source=source):
+    for version, _ in get_version_index(source):
+      if not version.is_prerelease and version in spec:
+        return str(version)
+
+  return None
+
+
+def find_tag_name(source: str, version: str) -> str:
+  """Maps a resolved version back to the git tag it came from, e.g. 1.2.3 -> v1.2.3"""
+  try:
+    for candidate, tag in get_version_index(source):
+      if str(candidate) == version:
+        return tag
+  except NETWORK_ERRORS:
+    pass
+  return version
+
+
+def find_tag_commit(source: str, version: str) -> str | None:
+  """Commit the tag of a resolved version points at, if the tags of source are cached. Never hits the network."""
+  entry = load_tag_cache(source)
+  if not entry:
+    return None
+
+  for candidate, tag in entry.get("versions", []):
+    if candidate == version:
+      return entry.get("commits", {}).get(tag)
+  return None
+
+
+PROJECT_LOCK = ".cget_lock"
+
+
+def _lock_file(f, blocking: bool):
+  if os.name == "nt":
+    import msvcrt
+
+    f.seek(0)
+    while True:
       try:
-          version = Version(clean_tag)
-          if not version.is_prerelease and version in spec:
-              candidate_versions.append(version)
-      except InvalidVersion:
-          continue
+        msvcrt.locking(f.fileno(), msvcrt.LK_LOCK if blocking else msvcrt.LK_NBLCK, 1)
+        return
+      except OSError:
+        # LK_LOCK gives up after ten seconds, keep waiting like flock does
+        if not blocking:
+          raise
+  else:
+    import fcntl
+
+    fcntl.flock(f.fileno(), fcntl.LOCK_EX if blocking else fcntl.LOCK_EX | fcntl.LOCK_NB)
+
+
+def _unlock_file(f):
+  if os.name == "nt":
+    import msvcrt
+
+    f.seek(0)
+    msvcrt.locking(f.fileno(), msvcrt.LK_UNLCK, 1)
+  else:
+    import fcntl
+
+    fcntl.flock(f.fileno(), fcntl.LOCK_UN)
+
+
+@contextmanager
+def file_lock(path: Path):
+  """Holds an exclusive advisory lock on path for the duration of the block, waiting for other holders."""
+  with open(path, "a+") as f:
+    try:
+      _lock_file(f, blocking=False)
+    except OSError:
+      click.echo(f"Waiting for another cget process to finish ({path})...")
+      _lock_file(f, blocking=True)
 
-  if not candidate_versions:
+    try:
+      yield
+    finally:
+      _unlock_file(f)
+
+
+class Transaction:
+  """
+  cget.json and cget.lock.json of one command, loaded once. Commands mutate `manifest` and `lock`
+  in place (or replace them); commit() rewrites only the files that changed, each atomically.
+  """
+
+  def __init__(self, root: Path):
+    self.manifest_path = root / "cget.json"
+    self.lock_path = root / "cget.lock.json"
+    self.manifest = self._load(self.manifest_path)
+    self.lock = self._load(self.lock_path) or {}
+    self._committed = self._snapshot()
+
+  @staticmethod
+  def _load(path: Path):
+    if not path.exists():
       return None
+    with open(path, "r") as f:
+      return json.load(f)
 
-  best_version = max(candidate_versions)
-  return str(best_version)
+  def _snapshot(self) -> tuple[str, str]:
+    return json.dumps(self.manifest, sort_keys=True), json.dumps(self.lock, sort_keys=True)
 
+  def rollback(self):
+    """Discards every change made since the last commit."""
+    manifest, lock = self._committed
+    self.manifest = json.loads(manifest)
+    self.lock = json.loads(lock)
 
-def save_lock(lock_data):
-  with open("cget.lock.json", "w") as f:
-    json.dump(lock_data, f, indent=2)
+  def commit(self):
+    manifest, lock = self._snapshot()
+    if self.manifest is not None and manifest != self._committed[0]:
+      write_json_atomic(self.manifest_path, self.manifest)
+    if lock != self._committed[1]:
+      write_json_atomic(self.lock_path, self.lock)
+    self._committed = (manifest, lock)
+
+
+@contextmanager
+def project_transaction(root: Path = Path(".")):
+  """
+  Runs a command against the project in root under its advisory lock, so concurrent cget processes
+  serialize instead of overwriting each other's changes. Commits on success, discards on error.
+  """
+  with file_lock(root / PROJECT_LOCK):
+    transaction = Transaction(root)
+    yield transaction
+    transaction.commit()
 
 
 def load_lock() -> dict:
@@ -72,20 +277,10 @@ def load_lock() -> dict:
   return {}
 
 
-def find_include_root(dest_dir: Path, name: str) -> Path:
-  """
-  Tries to find the correct subdirectory in dest_dir to symlink as the include path.
-  Prefers: <dest_dir>/include/<name>, <dest_dir>/<name>, or just <dest_dir> itself if it contains headers.
-  """
-  candidates = [
-    dest_dir / "include" / name,
-    dest_dir / name,
-    dest_dir / "include",
-    dest_dir,
-  ]
-
-  for path in candidates:
-    if path.exists() and any(path.rglob("*.h")):
-      return path
-
-  raise RuntimeError(f"Could not find a valid include path in {dest_dir}")
\ No newline at end of file
+def remove_path(path: Path):
+  """Removes a package directory, unlinking (never following) symlinks into the package store."""
+  if path.is_symlink() or path.is_file():
+    path.unlink()
+  elif path.exists():
+    shutil.rmtree(path)
+
@@ -0,0 +1,232 @@
+import os
+import re
+from pathlib import Path
+from cget.utils.cache import read_json
+from cget.utils.headers import include_root_headers
+
+
+SOURCE_DIRS = ["src", "apps", "tests"]
+SOURCE_EXTENSIONS = {".c", ".cc", ".cpp", ".cxx", ".c++"}
+INCLUDE_RE = re.compile(r'^[ \t]*#[ \t]*include[ \t]*([<"])([^>"\n]+)[>"]', re.MULTILINE)
+STD_HEADER_RE = re.compile(r"^[a-z_0-9]+$")
+
+MAX_PCH_HEADERS = 16
+# A header goes into the PCH when at least this many translation units (and this share of them) parse it
+MIN_PCH_USES = 2
+MIN_PCH_SHARE = 0.25
+
+# Rough front-end cost, for the saving estimate only: bytes of header text parsed per millisecond,
+# and measured-ballpark costs of standard headers (whose sizes depend on the toolchain)
+PARSE_BYTES_PER_MS = 3000
+STD_HEADER_MS = {
+  "algorithm": 60, "chrono": 70, "filesystem": 120, "format": 200, "functional": 60, "future": 90,
+  "iostream": 90, "map": 40, "memory": 50, "random": 90, "ranges": 150, "regex": 150, "sstream": 80,
+  "string": 50, "thread": 60, "unordered_map": 50, "variant": 40, "vector": 35
+}
+DEFAULT_STD_HEADER_MS = 20
+
+
+def read_includes(path: Path) -> list[tuple[bool, str]]:
+  """(angle brackets?, header) for every #include in a file."""
+  try:
+    text = path.read_text(errors="replace")
+  except OSError:
+    return []
+  return [(kind == "<", header.strip()) for kind, header in INCLUDE_RE.findall(text)]
+
+
+def source_files(roots: list[Path]) -> list[Path]:
+  files = []
+  for root in roots:
+    for name in SOURCE_DIRS:
+      for current, dirnames, filenames in os.walk(root / name):
+        dirnames[:] = [d for d in dirnames if not d.startswith(".")]
+        files += [Path(current) / filename for filename in filenames if Path(filename).suffix.lower() in SOURCE_EXTENSIONS]
+  return sorted(files)
+
+
+def dependency_headers(project_root: Path) -> dict[str, set[str]]:
+  """The headers each locked dependency provides under extern/<name>, read from the packages' header indexes."""
+  known = {}
+  for name, entry in (read_json(project_root / "cget.lock.json") or {}).items():
+    package_dir = project_root / ".cget_packages" / f"{name}@{entry['version']}"
+    include_root = project_root / "extern" / name
+    if package_dir.is_dir() and include_root.is_dir():
+      try:
+        known[name] = include_root_headers(package_dir, include_root)
+      except ValueError:
+        # extern/<name> does not point into the package, fall back to looking at files
+        continue
+  return known
+
+
+def classify(header: str, angle: bool, extern: Path, known: dict[str, set[str]]) -> tuple[str, str | None] | None:
+  """("std", None) for a standard header, ("extern", package) for a dependency's header, None otherwise."""
+  package, _, rest = header.partition("/")
+  if rest and (rest in known[package] if package in known else (extern / package / rest).is_file()):
+    return "extern", package
+  if angle and STD_HEADER_RE.match(header):
+    return "std", None
+  return None
+
+
+def resolve_local(header: str, including: Path, roots: list[Path]) -> Path | None:
+  """A project header: relative to the including file, then to each root's include/ and src/."""
+  candidates = [including.parent / header]
+  for root in roots:
+    candidates += [root / "include" / header, root / "src" / header]
+  for candidate in candidates:
+    if candidate.is_file():
+      return candidate
+  return None
+
+
+def external_includes(path: Path, roots: list[Path], extern: Path, known: dict[str, set[str]], memo: dict, visiting: set) -> set[tuple[str, str, str | None]]:
+  """Every std or dependency header a file reaches, following project headers transitively."""
+  if path in memo:
+    return memo[path]
+  if path in visiting:
+    return set()
+  visiting.add(path)
+
+  found = set()
+  for angle, header in read_includes(path):
+    kind = classify(header, angle, extern, known)
+    if kind:
+      found.add((header, *kind))
+      continue
+    local = resolve_local(header, path, roots)
+    if local:
+      found |= external_includes(local, roots, extern, known, memo, visiting)
+
+  visiting.discard(path)
+  memo[path] = found
+  return found
+
+
+def header_closure_size(path: Path, package_root: Path, seen: set) -> int:
+  """Bytes of a dependency header and every header of the same package it includes."""
+  path = path.resolve()
+  if path in seen or not path.is_file():
+    return 0
+  seen.add(path)
+
+  size = path.stat().st_size
+  for _, header in read_includes(path):
+    for candidate in [path.parent / header, package_root / header]:
+      if candidate.is_file():
+        size += header_closure_size(candidate, package_root, seen)
+        break
+  return size
+
+
+def estimate_parse_ms(header: str, kind: str, package: str | None, extern: Path) -> float:
+  if kind == "std":
+    return STD_HEADER_MS.get(header, DEFAULT_STD_HEADER_MS)
+  package_root = (extern / package).resolve()
+  return header_closure_size(package_root / header.partition("/")[2], package_root.parent, set()) / PARSE_BYTES_PER_MS
+
+
+def analyze_includes(project_root: Path, roots: list[Path] | None = None) -> dict:
+  """
+  Ranks the standard and dependency headers reached by the translation units under src/, apps/ and
+  tests/ of each root. Returns {"units": count, "headers": [...]}, each header with the number of
+  units parsing it, those units' real paths ("files"), its estimated parse time and the time a
+  precompiled header would save.
+  """
+  roots = roots or [project_root]
+  extern = project_root / "extern"
+  units = source_files(roots)
+  known = dependency_headers(project_root)
+
+  users: dict[tuple[str, str, str | None], list[Path]] = {}
+  memo = {}
+  for unit in units:
+    for found in external_includes(unit, roots, extern, known, memo, set()):
+      users.setdefault(found, []).append(unit)
+
+  headers = []
+  for (header, kind, package), files in users.items():
+    count = len(files)
+    if count < MIN_PCH_USES or count < MIN_PCH_SHARE * len(units):
+      continue
+    parse_ms = estimate_parse_ms(header, kind, package, extern)
+    headers.append({
+      "header": header,
+      "kind": kind,
+      "package": package,
+      "uses": count,
+      "files": sorted(os.path.realpath(path).replace("\\", "/") for path in files),
+      "parse_ms": parse_ms,
+      # Parsed once for the PCH instead of once per unit
+      "saved_ms": parse_ms * (count - 1)
+    })
+
+  headers.sort(key=lambda entry: (-entry["saved_ms"], entry["header"]))
+  return {"units": len(units), "headers": headers[:MAX_PCH_HEADERS]}
+
+
+def generate_precompiled_headers(headers: list[dict]) -> str:
+  """
+  Once the top-level CMakeLists.txt has been processed, gives every project target the headers that
+  its own sources include (matched by the files each header was found in). Dependency targets are left alone.
+  """
+  lines = ["# start of precompiled headers"]
+  for index, entry in enumerate(headers):
+    files = " ".join(f'"{path}"' for path in entry["files"])
+    lines += [
+      f'set(CGET_PCH_HEADER_{index} "<{entry["header"]}>")',
+      f"set(CGET_PCH_FILES_{index} {files})"
+    ]
+
+  lines += [
+    "",
+    "function(cget_apply_pch dir)",
+    '  get_property(_targets DIRECTORY "${dir}" PROPERTY BUILDSYSTEM_TARGETS)',
+    "  foreach(_target IN LISTS _targets)",
+    '    get_target_property(_type ${_target} TYPE)',
+    '    if(NOT _type MATCHES "^(EXECUTABLE|STATIC_LIBRARY|SHARED_LIBRARY|MODULE_LIBRARY|OBJECT_LIBRARY)$")',
+    "      continue()",
+    "    endif()",
+    "",
+    "    get_target_property(_sources ${_target} SOURCES)",
+    "    get_target_property(_source_dir ${_target} SOURCE_DIR)",
+    "    set(_files)",
+    "    foreach(_source IN LISTS _sources)",
+    '      get_filename_component(_file "${_source}" REALPATH BASE_DIR "${_source_dir}")',
+    '      list(APPEND _files "${_file}")',
+    "    endforeach()",
+    "",
+    "    set(_headers)",
+    f"    foreach(_index RANGE {len(headers) - 1})",
+    "      foreach(_file IN LISTS CGET_PCH_FILES_${_index})",
+    "        if(_file IN_LIST _files)",
+    '          list(APPEND _headers "${CGET_PCH_HEADER_${_index}}")',
+    "          break()",
+    "        endif()",
+    "      endforeach()",
+    "    endforeach()",
+    "    if(_headers)",
+    "      target_precompile_headers(${_target} PRIVATE ${_headers})",
+    "    endif()",
+    "  endforeach()",
+    "",
+    '  get_property(_subdirs DIRECTORY "${dir}" PROPERTY SUBDIRECTORIES)',
+    "  foreach(_subdir IN LISTS _subdirs)",
+    '    string(FIND "${_subdir}/" "${CMAKE_SOURCE_DIR}/" _project)',
+    '    string(FIND "${_subdir}/" "${CMAKE_SOURCE_DIR}/.cget_packages/" _package)',
+    '    string(FIND "${_subdir}/" "${CMAKE_BINARY_DIR}/" _fetched)',
+    "    if(_project EQUAL 0 AND NOT _package EQUAL 0 AND NOT _fetched EQUAL 0)",
+    '      cget_apply_pch("${_subdir}")',
+    "    endif()",
+    "  endforeach()",
+    "endfunction()",
+    "",
+    "if(CMAKE_VERSION VERSION_GREATER_EQUAL 3.19)",
+    '  cmake_language(DEFER DIRECTORY "${CMAKE_SOURCE_DIR}" CALL cget_apply_pch "${CMAKE_SOURCE_DIR}")',
+    "else()",
+    '  message(WARNING "cget: precompiled headers need CMake 3.19 or newer")',
+    "endif()",
+    "# end of precompiled headers"
+  ]
+  return "\n".join(lines)
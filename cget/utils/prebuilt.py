@@ -0,0 +1,195 @@
+import hashlib
+import json
+import shutil
+import time
+from pathlib import Path
+from cget.utils.cache import get_cache_dir
+
+
+COMPLETE_MARKER = ".cget-complete"
+
+# Builds one dependency into a shared install prefix the first time a (package, toolchain) key is
+# seen, then find_package()s it. Packages that cannot be built or installed that way are marked
+# unavailable for the key and added from source through CPM as before.
+PREBUILT_FUNCTION = """
+function(cget_add_package name version source_dir key flags)
+  string(SHA256 _key "${key};${CMAKE_SYSTEM_NAME};${CMAKE_SYSTEM_PROCESSOR};${CMAKE_GENERATOR};${CMAKE_TOOLCHAIN_FILE};${CMAKE_C_COMPILER_ID};${CMAKE_C_COMPILER_VERSION};${CMAKE_CXX_COMPILER_ID};${CMAKE_CXX_COMPILER_VERSION};${CMAKE_BUILD_TYPE};${CMAKE_CXX_STANDARD};${CMAKE_CXX_FLAGS}")
+  string(SUBSTRING "${_key}" 0 16 _key)
+  set(_prefix "${CGET_PREBUILT_DIR}/${name}/${_key}")
+
+  if(NOT EXISTS "${_prefix}/.cget-complete" AND NOT EXISTS "${_prefix}.unavailable")
+    message(STATUS "cget: building ${name}@${version} into the prebuilt cache")
+    string(RANDOM LENGTH 8 _suffix)
+    set(_staging "${_prefix}.tmp-${_suffix}")
+    set(_build "${CMAKE_BINARY_DIR}/_cget_prebuilt/${name}")
+    set(_config)
+    if(CMAKE_BUILD_TYPE)
+      set(_config --config "${CMAKE_BUILD_TYPE}")
+    endif()
+
+    file(REMOVE_RECURSE "${_build}")
+    execute_process(
+      COMMAND "${CMAKE_COMMAND}" -S "${source_dir}" -B "${_build}" -G "${CMAKE_GENERATOR}"
+        "-DCMAKE_BUILD_TYPE=${CMAKE_BUILD_TYPE}"
+        "-DCMAKE_INSTALL_PREFIX=${_staging}"
+        "-DCMAKE_PREFIX_PATH=${CMAKE_PREFIX_PATH}"
+        "-DCMAKE_TOOLCHAIN_FILE=${CMAKE_TOOLCHAIN_FILE}"
+        "-DCMAKE_C_COMPILER=${CMAKE_C_COMPILER}"
+        "-DCMAKE_CXX_COMPILER=${CMAKE_CXX_COMPILER}"
+        "-DCMAKE_C_COMPILER_LAUNCHER=${CMAKE_C_COMPILER_LAUNCHER}"
+        "-DCMAKE_CXX_COMPILER_LAUNCHER=${CMAKE_CXX_COMPILER_LAUNCHER}"
+        "-DCMAKE_CXX_STANDARD=${CMAKE_CXX_STANDARD}"
+        "-DCMAKE_CXX_FLAGS=${CMAKE_CXX_FLAGS} ${flags}"
+        ${ARGN}
+      RESULT_VARIABLE _result OUTPUT_QUIET)
+    if(_result EQUAL 0)
+      execute_process(COMMAND "${CMAKE_COMMAND}" --build "${_build}" --parallel ${_config} RESULT_VARIABLE _result OUTPUT_QUIET)
+    endif()
+    if(_result EQUAL 0)
+      execute_process(COMMAND "${CMAKE_COMMAND}" --install "${_build}" ${_config} RESULT_VARIABLE _result OUTPUT_QUIET)
+    endif()
+    file(REMOVE_RECURSE "${_build}")
+
+    if(_result EQUAL 0 AND EXISTS "${_staging}")
+      file(WRITE "${_staging}/.cget-complete" "${name}@${version}\\n")
+      if(EXISTS "${_prefix}")
+        # Another configure populated the same key first
+        file(REMOVE_RECURSE "${_staging}")
+      else()
+        file(RENAME "${_staging}" "${_prefix}")
+      endif()
+    else()
+      file(REMOVE_RECURSE "${_staging}")
+      file(WRITE "${_prefix}.unavailable" "build or install failed\\n")
+    endif()
+  endif()
+
+  if(EXISTS "${_prefix}/.cget-complete")
+    list(PREPEND CMAKE_PREFIX_PATH "${_prefix}")
+    find_package(${name} CONFIG QUIET PATHS "${_prefix}" NO_DEFAULT_PATH)
+    if(${name}_FOUND AND TARGET ${name}::${name})
+      message(STATUS "cget: using prebuilt ${name}@${version} from ${_prefix}")
+      file(TOUCH_NOCREATE "${_prefix}/.cget-complete")
+      set(CMAKE_PREFIX_PATH "${CMAKE_PREFIX_PATH}" PARENT_SCOPE)
+      return()
+    endif()
+    file(WRITE "${_prefix}.unavailable" "no ${name}::${name} target in the installed package\\n")
+  endif()
+
+  CPMAddPackage(
+    NAME ${name}
+    VERSION ${version}
+    SOURCE_DIR "${source_dir}"
+  )
+endfunction()
+"""
+
+
+def get_prebuilt_dir() -> Path:
+  return get_cache_dir() / "prebuilt"
+
+
+def get_cpm_cache_dir() -> Path:
+  return get_cache_dir() / "cpm"
+
+
+def option_args(options: dict) -> tuple[list[str], str]:
+  """Splits compilerOptions into -D cache arguments and extra CMAKE_CXX_FLAGS for dependency builds."""
+  args = []
+  flags = []
+  for key, value in options.items():
+    if key == "CMAKE_CXX_FLAGS":
+      flags += value if isinstance(value, list) else [value]
+    else:
+      args.append(f"-D{key}={'ON' if value is True else 'OFF' if value is False else value}")
+  return args, " ".join(flags)
+
+
+def package_key(name: str, lock: dict, options: dict) -> str:
+  """
+  The toolchain-independent half of a prebuilt cache key: source, commit and compilerOptions of the
+  package and the commits of everything it depends on. CMake adds compiler, build type and flags.
+  """
+  seen = {}
+  stack = [name]
+  while stack:
+    current = stack.pop()
+    if current in seen or current not in lock:
+      continue
+    entry = lock[current]
+    seen[current] = [entry["source"], entry.get("commit") or entry["version"]]
+    stack.extend(entry.get("dependencies", []))
+
+  data = json.dumps({"package": name, "closure": seen, "options": options}, sort_keys=True)
+  return hashlib.sha256(data.encode()).hexdigest()[:16]
+
+
+def generate_cpm_source_cache() -> str:
+  """Points CPM at a shared source cache unless the user configured one."""
+  lines = [
+    "# start of CPM source cache",
+    "if(NOT CPM_SOURCE_CACHE)",
+    f'  set(CPM_SOURCE_CACHE "{get_cpm_cache_dir().as_posix()}")',
+    "endif()",
+    "# end of CPM source cache"
+  ]
+  return "\n".join(lines)
+
+
+def generate_prebuilt_function() -> str:
+  lines = [
+    "# start of prebuilt cache",
+    f'set(CGET_PREBUILT_DIR "{get_prebuilt_dir().as_posix()}")',
+    PREBUILT_FUNCTION.strip(),
+    "# end of prebuilt cache"
+  ]
+  return "\n".join(lines)
+
+
+def generate_prebuilt_package(name: str, version: str, key: str, options: dict) -> str:
+  args, flags = option_args(options)
+  arguments = " ".join(f'"{arg}"' for arg in args)
+  source_dir = f"${{CMAKE_SOURCE_DIR}}/.cget_packages/{name}@{version}"
+  return f'cget_add_package({name} {version} "{source_dir}" {key} "{flags}" {arguments}'.rstrip() + ")\n"
+
+
+def list_prebuilt() -> list[dict]:
+  """Every complete prebuilt install prefix with its package name and last use."""
+  root = get_prebuilt_dir()
+  if not root.is_dir():
+    return []
+
+  entries = []
+  for marker in sorted(root.glob(f"*/*/{COMPLETE_MARKER}")):
+    prefix = marker.parent
+    entries.append({
+      "name": prefix.parent.name,
+      "key": prefix.name,
+      "package": marker.read_text().strip(),
+      "path": prefix,
+      "last_used": marker.stat().st_mtime
+    })
+  return entries
+
+
+def prune_prebuilt(older_than: float | None) -> list[dict]:
+  """Removes prebuilt prefixes not used for `older_than` seconds (all of them if None)."""
+  now = time.time()
+  removed = []
+
+  for entry in list_prebuilt():
+    if older_than is None or now - entry["last_used"] > older_than:
+      shutil.rmtree(entry["path"], ignore_errors=True)
+      removed.append(entry)
+
+  root = get_prebuilt_dir()
+  if root.is_dir():
+    # Failure markers and staging prefixes of interrupted builds; a later configure retries the build
+    for path in list(root.glob("*/*.unavailable")) + list(root.glob("*/*.tmp-*")):
+      if older_than is None or now - path.stat().st_mtime > older_than:
+        if path.is_dir():
+          shutil.rmtree(path, ignore_errors=True)
+        else:
+          path.unlink()
+
+  return removed
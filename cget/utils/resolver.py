@@ -0,0 +1,224 @@
+from packaging.specifiers import SpecifierSet, InvalidSpecifier
+from packaging.version import Version, InvalidVersion
+from cget.utils import store
+from cget.utils.cache import load_manifest_cache, save_manifest_cache, read_json
+from cget.utils.fetch import fetch_manifest, fetch_to_store, fetch_variant, sparse_patterns
+from cget.utils.misc import get_version_index, find_tag_name, run_parallel, NETWORK_ERRORS
+from cget.utils.sources import split_source, default_name, github_slug
+from cget.utils.trace import span, traced
+
+
+class ResolutionError(RuntimeError):
+  pass
+
+
+def to_specifier(version_range: str | None) -> SpecifierSet:
+  if not version_range or version_range == "latest":
+    return SpecifierSet(">=0.0")
+
+  try:
+    return SpecifierSet(version_range)
+  except InvalidSpecifier:
+    # A bare version such as fmtlib/fmt@10.2.1 pins that exact release
+    return SpecifierSet(f"=={version_range.lstrip('v')}")
+
+
+def parse_requirement(dep: dict) -> tuple[str, str, str]:
+  """Returns (name, source, version range) for a cget.json dependency entry."""
+  source, pinned = split_source(dep["source"])
+  name = dep.get("name") or default_name(source)
+  return name, source, dep.get("version") or pinned or "latest"
+
+
+class Resolver:
+  """
+  Backtracking resolver over the transitive dependency graph.
+  Tag lists and package manifests are memoized per source and per (source, version).
+  """
+
+  def __init__(self, preferred: dict | None = None):
+    self.preferred = preferred or {}
+    self.manifests: dict[tuple[str, str], list[tuple[str, str, str]]] = {}
+    self.specs: dict[str, SpecifierSet] = {}
+    self.conflicts: dict[str, str] = {}
+    # "fetch" settings by source, from cget.json or from the manifest that first names the source
+    self.fetch: dict[str, object] = {}
+
+  def add_fetch_settings(self, dependencies: list[dict]):
+    for dep in dependencies:
+      if dep.get("fetch") is None or not dep.get("source"):
+        continue
+      name, source, _ = parse_requirement(dep)
+      try:
+        sparse_patterns(dep["fetch"])
+      except ValueError as e:
+        raise ResolutionError(f"'{name}': {e}")
+      self.fetch.setdefault(source, dep["fetch"])
+
+  def specifier(self, version_range: str) -> SpecifierSet:
+    if version_range not in self.specs:
+      self.specs[version_range] = to_specifier(version_range)
+    return self.specs[version_range]
+
+  def candidates(self, name: str, source: str, spec: SpecifierSet):
+    """Yields matching versions newest first, trying the locked version before touching the network."""
+    preferred = self.preferred.get(name)
+    if preferred and preferred.get("source") == source:
+      try:
+        if Version(preferred["version"]) in spec:
+          yield preferred["version"]
+      except (InvalidVersion, TypeError):
+        preferred = None
+
+    for version, _ in get_version_index(source):
+      if version.is_prerelease or version not in spec:
+        continue
+      version = str(version)
+      if preferred and version == preferred["version"]:
+        continue
+      yield version
+
+  def dependencies(self, source: str, version: str) -> list[tuple[str, str, str]]:
+    key = (source, version)
+    if key not in self.manifests:
+      manifest = load_package_manifest(source, version, self.fetch.get(source))
+      deps = manifest.get("dependencies", []) if manifest else []
+      self.add_fetch_settings(deps)
+      self.manifests[key] = [parse_requirement(dep) for dep in deps if dep.get("source")]
+    return self.manifests[key]
+
+  def solve(self, requirements: list[tuple[str, str, str]]) -> dict:
+    constraints: dict[str, list[tuple[str, str, str | None]]] = {}
+    sources: dict[str, str] = {}
+
+    for name, source, version_range in requirements:
+      if sources.setdefault(name, source) != source:
+        raise ResolutionError(f"'{name}' is required from both '{sources[name]}' and '{source}'")
+      constraints.setdefault(name, []).append((version_range, "cget.json", None))
+
+    # A direct dependency no version satisfies fails the same way whatever else is chosen
+    for name, wanted in constraints.items():
+      spec = SpecifierSet()
+      for version_range, _, _ in wanted:
+        spec &= self.specifier(version_range)
+      if next(self.candidates(name, sources[name], spec), None) is None:
+        ranges = ", ".join(version_range for version_range, _, _ in wanted)
+        raise ResolutionError(f"Could not resolve dependencies: no version of '{name}' satisfies {ranges} (from cget.json)")
+
+    solution, _ = self._solve({}, constraints, sources, list(constraints))
+    if solution is None:
+      details = "; ".join(self.conflicts.values()) or "no compatible versions"
+      raise ResolutionError(f"Could not resolve dependencies: {details}")
+
+    solution, sources = solution
+    return {
+      name: {
+        "source": sources[name],
+        "version": version,
+        "dependencies": sorted(dep for dep, _, _ in self.dependencies(sources[name], version)),
+        "fetch": self.fetch.get(sources[name])
+      }
+      for name, version in solution.items()
+    }
+
+  def _solve(self, chosen: dict, constraints: dict, sources: dict, queue: list) -> tuple[tuple[dict, dict] | None, set[str]]:
+    """
+    Returns (solution, empty set), or (None, culprits): the packages whose choices caused the failure.
+    When the package being chosen is not a culprit of its subtree's failure, no other version of it
+    can help, so the search jumps straight back instead of trying each one.
+    """
+    if not queue:
+      return (chosen, sources), set()
+
+    name, rest = queue[0], queue[1:]
+    spec = SpecifierSet()
+    for version_range, _, _ in constraints[name]:
+      spec &= self.specifier(version_range)
+    culprits = {parent for _, _, parent in constraints[name] if parent}
+
+    for version in self.candidates(name, sources[name], spec):
+      new_constraints = dict(constraints)
+      new_sources = dict(sources)
+      new_queue = list(rest)
+      conflict = None
+
+      for dep, dep_source, dep_range in self.dependencies(sources[name], version):
+        dep_parents = {parent for _, _, parent in new_constraints.get(dep, []) if parent}
+        if new_sources.setdefault(dep, dep_source) != dep_source:
+          conflict = f"'{name}@{version}' requires '{dep}' from '{dep_source}' but '{new_sources[dep]}' is already used"
+          culprits |= dep_parents
+          break
+
+        if dep in chosen and Version(chosen[dep]) not in self.specifier(dep_range):
+          conflict = f"'{name}@{version}' requires {dep} {dep_range} but {dep}@{chosen[dep]} was selected"
+          culprits |= dep_parents | {dep}
+          break
+
+        if dep not in new_constraints:
+          new_queue.append(dep)
+        new_constraints[dep] = new_constraints.get(dep, []) + [(dep_range, f"{name}@{version}", name)]
+
+      if conflict:
+        self.conflicts[name] = conflict
+        continue
+
+      result, failed = self._solve({**chosen, name: version}, new_constraints, new_sources, new_queue)
+      if result is not None:
+        return result, set()
+      if name not in failed:
+        return None, failed
+      culprits |= failed
+
+    if name not in self.conflicts:
+      wanted = ", ".join(f"{version_range} (from {parent})" for version_range, parent, _ in constraints[name])
+      self.conflicts[name] = f"no version of '{name}' satisfies {wanted}"
+    culprits.discard(name)
+    return None, culprits
+
+
+@traced("load_manifest")
+def load_package_manifest(source: str, version: str, fetch=None) -> dict | None:
+  """Reads the cget.json of source@version from the store, the manifest cache, or the network."""
+  variant = fetch_variant(fetch)
+  stored = store.lookup(source, version) or (variant and store.lookup(source, version, variant))
+  if stored:
+    return read_json(stored / "cget.json")
+
+  cached = load_manifest_cache(source, version)
+  if cached is not None:
+    return cached["manifest"]
+
+  slug = github_slug(source)
+  if slug:
+    manifest = fetch_manifest(slug, find_tag_name(source, version))
+  else:
+    # Other hosts cannot serve a single file, so fetch the package (it is needed for the install anyway)
+    stored = fetch_to_store(default_name(source), source, version, force=False, quiet=True, fetch=fetch)
+    manifest = read_json(stored / "cget.json")
+
+  save_manifest_cache(source, version, manifest)
+  return manifest
+
+
+def resolve_dependencies(dependencies: list[dict], preferred: dict | None = None, jobs: int = 1) -> dict:
+  """Solves the full dependency graph of the given cget.json entries. Returns name -> node."""
+  requirements = [parse_requirement(dep) for dep in dependencies]
+  resolver = Resolver(preferred)
+  resolver.add_fetch_settings(dependencies)
+
+  def warm(requirement):
+    name, source, version_range = requirement
+    locked = resolver.preferred.get(name)
+    if locked and locked.get("source") == source:
+      return
+    try:
+      get_version_index(source)
+    except NETWORK_ERRORS:
+      pass
+
+  # Tag lists of direct dependencies are the bulk of the network time, fetch them concurrently
+  with span("warm_tag_indexes", count=len(requirements)):
+    run_parallel(warm, requirements, jobs)
+
+  with span("solve"):
+    return resolver.solve(requirements)
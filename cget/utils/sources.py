@@ -0,0 +1,153 @@
+import click
+import os
+import re
+import subprocess
+from abc import ABC, abstractmethod
+
+
+GITHUB = "https://github.com"
+
+
+def split_source(source: str) -> tuple[str, str | None]:
+  """'user/repo@1.2' -> ('user/repo', '1.2'), leaving 'git@host:user/repo.git' alone."""
+  head, sep, tail = source.rpartition("@")
+  if sep and head and "/" not in tail and ":" not in tail:
+    return head, tail
+  return source, None
+
+
+def is_url(source: str) -> bool:
+  return "://" in source or source.startswith("git@")
+
+
+def default_name(source: str) -> str:
+  """Package name of a source: the repository name without .git."""
+  name = re.split(r"[/:]", source.rstrip("/"))[-1]
+  return name[:-4] if name.endswith(".git") else name
+
+
+def source_path(source: str) -> str:
+  """
+  A relative, filesystem-safe path naming source, e.g. 'fmtlib/fmt' or 'example.com/team/lib'.
+  Absolute paths and '..' components are neutralised, so the result never escapes the directory it is joined to.
+  """
+  path = source
+  if is_url(source):
+    path = re.sub(r"^[a-z+]+://", "", path)
+    path = re.sub(r"^[^@/]+@", "", path)
+    path = path.replace(":", "/").rstrip("/")
+    path = path[:-4] if path.endswith(".git") else path
+
+  parts = [re.sub(r"[^A-Za-z0-9._-]", "_", part) for part in re.split(r"[/\\]+", path) if part not in ("", ".")]
+  return "/".join(part.replace(".", "_") if part == ".." else part for part in parts) or "_"
+
+
+def git_base() -> str:
+  return os.environ.get("CGET_GIT_BASE", GITHUB).rstrip("/")
+
+
+def repo_url(source: str) -> str:
+  if is_url(source):
+    return source
+  return f"{git_base()}/{source}.git"
+
+
+def github_slug(source: str) -> str | None:
+  """'user/repo' if source is hosted on GitHub, which enables archive and raw-file downloads."""
+  url = repo_url(source)
+  if not url.startswith(GITHUB + "/"):
+    return None
+
+  slug = url[len(GITHUB) + 1:]
+  return slug[:-4] if slug.endswith(".git") else slug
+
+
+class SourceBackend(ABC):
+  """Lists the tags of a package source together with the commit each one points at."""
+
+  name = None
+
+  @abstractmethod
+  def fetch_tags(self, source: str, validator: str | None = None) -> tuple[dict[str, str] | None, str | None]:
+    """
+    Returns ({tag: commit}, validator), or (None, validator) if the tags did not change
+    since `validator` was issued. Backends without conditional requests return None validators.
+    """
+
+
+class GitBackend(SourceBackend):
+  """Reads every tag in one `git ls-remote` round trip. Works with any git host, mirror or file:// repo."""
+
+  name = "git"
+
+  def fetch_tags(self, source, validator=None):
+    result = subprocess.run(
+      ["git", "ls-remote", "--tags", repo_url(source)],
+      capture_output=True, text=True, check=True
+    )
+
+    tags = {}
+    for line in result.stdout.splitlines():
+      commit, _, ref = line.partition("\t")
+      if not ref.startswith("refs/tags/"):
+        continue
+      tag = ref[len("refs/tags/"):]
+      if tag.endswith("^{}"):
+        # Peeled entry of an annotated tag: the commit it points at
+        tags[tag[:-3]] = commit
+      else:
+        tags.setdefault(tag, commit)
+
+    return tags, None
+
+
+class GitHubApiBackend(SourceBackend):
+  """Pages through the GitHub REST API, revalidating with ETags so unchanged repos cost one 304."""
+
+  name = "github"
+
+  def fetch_tags(self, source, validator=None):
+    import requests
+
+    slug = github_slug(source) if is_url(source) else source
+    if not slug:
+      raise click.ClickException(f"'{source}' is not a GitHub repository, set CGET_SOURCE_BACKEND=git to use it")
+
+    api = os.environ.get("CGET_GITHUB_API", "https://api.github.com").rstrip("/")
+    url = f"{api}/repos/{slug}/tags"
+    headers = {"If-None-Match": validator} if validator else {}
+    tags = {}
+    page = 1
+
+    response = requests.get(url, params={"per_page": 100, "page": page}, headers=headers)
+    if response.status_code == 304:
+      return None, validator
+    response.raise_for_status()
+    etag = response.headers.get("ETag")
+
+    while True:
+      data = response.json()
+      if not data:
+        break
+      tags.update({tag["name"]: tag["commit"]["sha"] for tag in data})
+      if len(data) < 100:
+        break
+      page += 1
+      response = requests.get(url, params={"per_page": 100, "page": page})
+      response.raise_for_status()
+
+    return tags, etag
+
+
+BACKENDS = {
+  GitBackend.name: GitBackend,
+  GitHubApiBackend.name: GitHubApiBackend,
+}
+
+
+def get_backend(name: str | None = None) -> SourceBackend:
+  """The configured tag backend: `name`, else $CGET_SOURCE_BACKEND, else git ls-remote."""
+  name = name or os.environ.get("CGET_SOURCE_BACKEND") or GitBackend.name
+  if name not in BACKENDS:
+    raise click.ClickException(f"Unknown source backend '{name}' (expected one of {', '.join(BACKENDS)})")
+  return BACKENDS[name]()
@@ -0,0 +1,195 @@
+import os
+import shutil
+import tempfile
+import time
+from pathlib import Path
+from cget.utils.cache import get_cache_dir
+from cget.utils.hashing import remove_hash_cache
+from cget.utils.headers import remove_header_index
+from cget.utils.sources import source_path
+
+
+def get_store_dir() -> Path:
+  return get_cache_dir() / "store"
+
+
+def source_dir(source: str) -> Path:
+  return get_store_dir() / source_path(source)
+
+
+def entry_name(name: str, variant: str | None = None) -> str:
+  """Partial checkouts are stored beside full ones as <commit>~<variant> (refs as <version>~<variant>)."""
+  return f"{name}~{variant}" if variant else name
+
+
+def entry_commit(path: Path) -> str:
+  return path.name.partition("~")[0]
+
+
+def entry_variant(path: Path) -> str | None:
+  return path.name.partition("~")[2] or None
+
+
+def ref_path(source: str, version: str, variant: str | None = None) -> Path:
+  return source_dir(source) / "refs" / entry_name(version, variant)
+
+
+def lookup(source: str, version: str, variant: str | None = None) -> Path | None:
+  """Returns the store entry holding source@version, or None if it was never fetched."""
+  try:
+    name = ref_path(source, version, variant).read_text().strip()
+  except OSError:
+    return None
+
+  path = source_dir(source) / name
+  return path if name and path.is_dir() else None
+
+
+def lookup_commit(source: str, version: str, commit: str, variant: str | None = None) -> Path | None:
+  """Finds a stored checkout by commit and records it as `version` for later lookups."""
+  path = source_dir(source) / entry_name(commit, variant)
+  if not path.is_dir():
+    return None
+
+  write_ref(source, version, path.name, variant)
+  return path
+
+
+def write_ref(source: str, version: str, name: str, variant: str | None = None):
+  ref = ref_path(source, version, variant)
+  ref.parent.mkdir(parents=True, exist_ok=True)
+  fd, tmp = tempfile.mkstemp(dir=ref.parent, prefix=f".{version}.")
+  with os.fdopen(fd, "w") as f:
+    f.write(name)
+  os.replace(tmp, ref)
+
+
+def add(source: str, version: str, checkout: Path, commit: str, replace: bool = False, variant: str | None = None) -> Path:
+  """Moves a fresh checkout into the store under its commit and records version -> commit."""
+  dest = source_dir(source) / entry_name(commit, variant)
+
+  if dest.exists() and replace:
+    shutil.rmtree(dest)
+
+  try:
+    os.rename(checkout, dest)
+  except OSError:
+    # Another cget process stored the same commit first, its copy is identical
+    if not dest.is_dir():
+      raise
+    shutil.rmtree(checkout, ignore_errors=True)
+
+  write_ref(source, version, dest.name, variant)
+  return dest
+
+
+def staging_dir(source: str) -> tempfile.TemporaryDirectory:
+  """A temporary directory on the same filesystem as the store entry, so add() can rename."""
+  parent = source_dir(source)
+  parent.mkdir(parents=True, exist_ok=True)
+  return tempfile.TemporaryDirectory(dir=parent, prefix=".tmp-")
+
+
+def touch(path: Path):
+  """Marks a store entry as used now so `cget cache prune` keeps it."""
+  try:
+    os.utime(path)
+  except OSError:
+    pass
+
+
+def dir_size(path: Path) -> int:
+  """Apparent size of everything under path, without following symlinks inside it."""
+  total = 0
+  stack = [path]
+  while stack:
+    try:
+      with os.scandir(stack.pop()) as entries:
+        for entry in entries:
+          try:
+            if entry.is_dir(follow_symlinks=False):
+              stack.append(entry.path)
+            else:
+              total += entry.stat(follow_symlinks=False).st_size
+          except OSError:
+            continue
+    except OSError:
+      continue
+  return total
+
+
+def source_dirs() -> list[Path]:
+  """Every directory of the store that holds checkouts of one source (recognised by its refs/)."""
+  found = []
+  for root, dirnames, _ in os.walk(get_store_dir()):
+    if "refs" in dirnames:
+      found.append(Path(root))
+      dirnames[:] = []
+    else:
+      dirnames[:] = [d for d in dirnames if not d.startswith(".")]
+  return sorted(found)
+
+
+def list_entries() -> list[dict]:
+  """Lists every stored checkout with the versions that point at it."""
+  store = get_store_dir()
+  entries = []
+
+  for repo in source_dirs():
+    source = repo.relative_to(store).as_posix()
+    versions: dict[str, list[str]] = {}
+    for ref in (repo / "refs").iterdir():
+      versions.setdefault(ref.read_text().strip(), []).append(ref.name)
+
+    for checkout in sorted(repo.iterdir()):
+      if checkout.name == "refs" or checkout.name.startswith(".") or not checkout.is_dir():
+        continue
+      entries.append({
+        "source": source,
+        "commit": entry_commit(checkout),
+        "variant": entry_variant(checkout),
+        "versions": sorted(versions.get(checkout.name, [])),
+        "path": checkout,
+        "last_used": checkout.stat().st_mtime
+      })
+
+  return entries
+
+
+def remove_entry(entry: dict):
+  remove_header_index(entry["path"])
+  remove_hash_cache(entry["path"])
+  shutil.rmtree(entry["path"])
+
+  refs = entry["path"].parent / "refs"
+  for version in entry["versions"]:
+    ref = refs / version
+    if ref.exists():
+      ref.unlink()
+
+
+def linked_entries(packages_dir: Path) -> set[Path]:
+  """Store entries that the links in a project's .cget_packages point at."""
+  if not packages_dir.is_dir():
+    return set()
+  return {path.resolve() for path in packages_dir.iterdir() if path.is_symlink()}
+
+
+def prune(older_than: float | None, keep: set[Path] = frozenset()) -> list[dict]:
+  """Removes entries not used for `older_than` seconds (all entries if None), except those in `keep`."""
+  now = time.time()
+  removed = []
+
+  for entry in list_entries():
+    if entry["path"].resolve() in keep:
+      continue
+    if older_than is None or now - entry["last_used"] > older_than:
+      remove_entry(entry)
+      removed.append(entry)
+
+  # Staging directories left behind by interrupted downloads
+  for staging in [path for repo in source_dirs() for path in repo.glob(".tmp-*")]:
+    if now - staging.stat().st_mtime > 24 * 3600:
+      shutil.rmtree(staging, ignore_errors=True)
+
+  return removed
@@ -0,0 +1,105 @@
+import click
+import functools
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+
+
+_enabled = False
+_events: list[dict] = []
+_lock = threading.Lock()
+_origin = time.perf_counter()
+
+
+def enable():
+  global _enabled
+  _enabled = True
+
+
+def is_enabled() -> bool:
+  return _enabled
+
+
+@contextmanager
+def span(name: str, category: str = "cget", **args):
+  """Records the wall time of the enclosed block as a Chrome trace "complete" event."""
+  if not _enabled:
+    yield
+    return
+
+  start = time.perf_counter()
+  try:
+    yield
+  finally:
+    end = time.perf_counter()
+    event = {
+      "name": name,
+      "cat": category,
+      "ph": "X",
+      "ts": round((start - _origin) * 1e6, 3),
+      "dur": round((end - start) * 1e6, 3),
+      "pid": os.getpid(),
+      "tid": threading.get_native_id(),
+      "args": args
+    }
+    with _lock:
+      _events.append(event)
+
+
+def traced(name: str, category: str = "cget"):
+  """Decorator form of span()."""
+  def decorator(func):
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+      with span(name, category):
+        return func(*args, **kwargs)
+    return wrapper
+  return decorator
+
+
+def write_trace(path: str):
+  """Writes the recorded spans as Chrome trace-event JSON (loads in Perfetto and chrome://tracing)."""
+  with _lock:
+    events = list(_events)
+
+  threads = {(event["pid"], event["tid"]) for event in events}
+  metadata = [
+    {"name": "thread_name", "ph": "M", "pid": pid, "tid": tid, "args": {"name": "main" if tid == threading.main_thread().native_id else f"worker {tid}"}}
+    for pid, tid in sorted(threads)
+  ]
+
+  with open(path, "w") as f:
+    json.dump({"traceEvents": metadata + events, "displayTimeUnit": "ms"}, f)
+
+
+def print_summary():
+  with _lock:
+    events = list(_events)
+
+  if not events:
+    return
+
+  totals: dict[str, list[float]] = {}
+  for event in events:
+    totals.setdefault(event["name"], []).append(event["dur"] / 1e6)
+
+  click.echo("\nTimings:")
+  click.echo(f"  {'phase':<28} {'count':>6} {'total':>10} {'max':>10}")
+  for name, durations in sorted(totals.items(), key=lambda item: sum(item[1]), reverse=True):
+    click.echo(f"  {name:<28} {len(durations):>6} {sum(durations):>9.3f}s {max(durations):>9.3f}s")
+
+
+def finish(summary: bool):
+  """Emits whatever was requested: the summary table and/or the $CGET_TRACE file."""
+  if not _enabled:
+    return
+
+  if summary:
+    print_summary()
+
+  path = os.environ.get("CGET_TRACE")
+  if path:
+    write_trace(path)
+    click.echo(f"Trace written to {path}")
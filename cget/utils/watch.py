@@ -0,0 +1,204 @@
+import os
+import select
+import struct
+import sys
+import time
+from pathlib import Path
+
+
+IGNORED_SUFFIXES = ("~", ".swp", ".swx", ".tmp")
+
+# inotify(7) constants
+IN_MODIFY = 0x00000002
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_FROM = 0x00000040
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_DELETE = 0x00000200
+IN_DELETE_SELF = 0x00000400
+IN_ISDIR = 0x40000000
+IN_NONBLOCK = 0o4000
+IN_CLOEXEC = 0o2000000
+WATCH_MASK = IN_MODIFY | IN_CLOSE_WRITE | IN_MOVED_FROM | IN_MOVED_TO | IN_CREATE | IN_DELETE | IN_DELETE_SELF
+EVENT_HEADER = struct.Struct("iIII")
+
+
+def is_ignored(name: str) -> bool:
+  # Hidden files, editor backups and vim's 4913 write probe
+  return name.startswith(".") or name.endswith(IGNORED_SUFFIXES) or name == "4913"
+
+
+def walk_files(root: Path, dirs: list[str], files: list[str]) -> list[Path]:
+  """Every watched file: `files` in root plus everything under `dirs`."""
+  paths = [root / name for name in files if (root / name).is_file()]
+  for name in dirs:
+    for current, dirnames, filenames in os.walk(root / name):
+      dirnames[:] = [d for d in dirnames if not is_ignored(d)]
+      paths += [Path(current) / filename for filename in filenames if not is_ignored(filename)]
+  return paths
+
+
+class PollingWatcher:
+  """Compares (mtime, size) snapshots of the watched trees. Works everywhere, costs a walk per interval."""
+
+  def __init__(self, root: Path, dirs: list[str], files: list[str], interval: float = 0.5):
+    self.root = root
+    self.dirs = dirs
+    self.files = files
+    self.interval = interval
+    self.snapshot = self.scan()
+
+  def scan(self) -> dict[Path, tuple[int, int]]:
+    found = {}
+    for path in walk_files(self.root, self.dirs, self.files):
+      try:
+        st = path.stat()
+      except OSError:
+        continue
+      found[path] = (st.st_mtime_ns, st.st_size)
+    return found
+
+  def poll(self, timeout: float) -> list[tuple[Path, str]]:
+    time.sleep(min(timeout, self.interval))
+    current = self.scan()
+    changes = [(path, "created") for path in current.keys() - self.snapshot.keys()]
+    changes += [(path, "deleted") for path in self.snapshot.keys() - current.keys()]
+    changes += [(path, "modified") for path in current.keys() & self.snapshot.keys() if current[path] != self.snapshot[path]]
+    self.snapshot = current
+    return changes
+
+  def settle(self, changes: list[tuple[Path, str]]) -> list[tuple[Path, str]]:
+    # Snapshot diffs are already net changes
+    return changes
+
+  def close(self):
+    pass
+
+
+class InotifyWatcher:
+  """Linux inotify through ctypes: one watch per directory, the project root watched for `files` only."""
+
+  def __init__(self, root: Path, dirs: list[str], files: list[str]):
+    import ctypes
+    import ctypes.util
+
+    self.libc = ctypes.CDLL(ctypes.util.find_library("c") or "libc.so.6", use_errno=True)
+    self.fd = self.libc.inotify_init1(IN_NONBLOCK | IN_CLOEXEC)
+    if self.fd < 0:
+      raise OSError(ctypes.get_errno(), "inotify_init1 failed")
+
+    self.root = root
+    self.dirs = set(dirs)
+    self.files = set(files)
+    self.watches: dict[int, Path] = {}
+    self.known = set(walk_files(root, dirs, files))
+    # Watching the directory rather than the files survives editors that save by renaming
+    self.add_watch(root)
+    for name in dirs:
+      if (root / name).is_dir():
+        self.add_tree(root / name)
+
+  def add_watch(self, path: Path):
+    wd = self.libc.inotify_add_watch(self.fd, os.fsencode(path), WATCH_MASK)
+    if wd >= 0:
+      self.watches[wd] = path
+
+  def add_tree(self, path: Path):
+    for root, dirnames, _ in os.walk(path):
+      dirnames[:] = [d for d in dirnames if not is_ignored(d)]
+      self.add_watch(Path(root))
+
+  def poll(self, timeout: float) -> list[tuple[Path, str]]:
+    ready, _, _ = select.select([self.fd], [], [], timeout)
+    if not ready:
+      return []
+
+    try:
+      data = os.read(self.fd, 64 * 1024)
+    except BlockingIOError:
+      return []
+
+    changes = []
+    offset = 0
+    while offset < len(data):
+      wd, mask, _, length = EVENT_HEADER.unpack_from(data, offset)
+      name = data[offset + EVENT_HEADER.size:offset + EVENT_HEADER.size + length].rstrip(b"\0").decode(errors="replace")
+      offset += EVENT_HEADER.size + length
+
+      directory = self.watches.get(wd)
+      if directory is None or not name or is_ignored(name):
+        continue
+      if directory == self.root and name not in self.files and name not in self.dirs:
+        continue
+
+      path = directory / name
+      if mask & IN_ISDIR:
+        if mask & (IN_CREATE | IN_MOVED_TO):
+          self.add_tree(path)
+        changes.append((path, "created" if mask & (IN_CREATE | IN_MOVED_TO) else "deleted"))
+      elif mask & (IN_CREATE | IN_MOVED_TO):
+        changes.append((path, "created"))
+      elif mask & (IN_DELETE | IN_MOVED_FROM):
+        changes.append((path, "deleted"))
+      else:
+        changes.append((path, "modified"))
+
+    return changes
+
+  def settle(self, changes: list[tuple[Path, str]]) -> list[tuple[Path, str]]:
+    """
+    Reduces a burst of events to net changes against the files known before it, so a save that
+    writes a temp file and renames it over the original is one modification, not a new file.
+    """
+    settled = []
+    for path in dict.fromkeys(path for path, _ in changes):
+      if not path.exists():
+        # Also covers files created and removed again within the burst (editor temp files)
+        gone = {known for known in self.known if known == path or path in known.parents}
+        self.known -= gone
+        settled += [(known, "deleted") for known in sorted(gone)]
+      elif path.is_dir():
+        new_files = set(walk_files(path, ["."], [])) - self.known
+        self.known |= new_files
+        settled += [(new_file, "created") for new_file in sorted(new_files)]
+      elif path not in self.known:
+        self.known.add(path)
+        settled.append((path, "created"))
+      else:
+        settled.append((path, "modified"))
+
+    return settled
+
+  def close(self):
+    os.close(self.fd)
+
+
+def create_watcher(root: Path, dirs: list[str], files: list[str], polling: bool = False):
+  """An inotify watcher on Linux, falling back to polling elsewhere or when inotify is unavailable."""
+  if not polling and sys.platform.startswith("linux"):
+    try:
+      return InotifyWatcher(root, dirs, files)
+    except (OSError, AttributeError):
+      pass
+  return PollingWatcher(root, dirs, files)
+
+
+def wait_for_changes(watcher, debounce: float) -> list[tuple[Path, str]]:
+  """Blocks until something changes, then keeps collecting until `debounce` seconds pass without events."""
+  changes = []
+  while not changes:
+    changes = watcher.poll(1.0)
+
+  while True:
+    more = watcher.poll(debounce)
+    if not more:
+      return watcher.settle(changes)
+    changes += more
+
+
+def needs_configure(changes: list[tuple[Path, str]], configure_files: set[str]) -> bool:
+  """Build-only for edits to existing sources; added or removed files change globs and need CMake."""
+  return any(
+    kind != "modified" or path.name in configure_files or path.suffix == ".cmake"
+    for path, kind in changes
+  )
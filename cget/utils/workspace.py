@@ -0,0 +1,151 @@
+import click
+import json
+import os
+from pathlib import Path
+from cget.utils.cache import read_json
+from cget.utils.resolver import parse_requirement
+
+
+WORKSPACE_FILE = "cget-workspace.json"
+SUPERBUILD_MARKER = "# Auto-generated by cget from cget-workspace.json"
+
+
+def load_workspace(root: Path) -> dict | None:
+  """The cget-workspace.json in root, or None if root is not a workspace."""
+  path = root / WORKSPACE_FILE
+  if not path.exists():
+    return None
+
+  with open(path, "r") as f:
+    workspace = json.load(f)
+
+  if not isinstance(workspace.get("members"), list) or not workspace["members"]:
+    raise ValueError(f"{path} must list its member projects in \"members\"")
+  return workspace
+
+
+def load_members(root: Path, workspace: dict) -> list[tuple[Path, dict]]:
+  """(member directory, member cget.json) for every member, in the order the workspace lists them."""
+  members = []
+  for member in workspace["members"]:
+    path = root / member
+    manifest = path / "cget.json"
+    if not manifest.exists():
+      raise ValueError(f"Workspace member '{member}' has no cget.json")
+    with open(manifest, "r") as f:
+      members.append((path, json.load(f)))
+  return members
+
+
+def merge_manifests(root: Path, workspace: dict, members: list[tuple[Path, dict]]) -> dict:
+  """
+  One manifest for the whole workspace. Every member's requirements are kept, so the resolver
+  intersects the ranges members ask for instead of picking one of them.
+  """
+  merged = {
+    "name": workspace.get("name", root.resolve().name),
+    "dependencies": [],
+    "devDependencies": [],
+    "compilerOptions": workspace.get("compilerOptions", {})
+  }
+  for key in ["compilerCache", "prebuiltCache"]:
+    if key in workspace:
+      merged[key] = workspace[key]
+
+  for _, manifest in members:
+    merged["dependencies"] += manifest.get("dependencies", [])
+    merged["devDependencies"] += manifest.get("devDependencies", [])
+  return merged
+
+
+def member_packages(manifest: dict, lock: dict) -> list[str]:
+  """The locked packages a member uses: what its cget.json lists and everything those depend on."""
+  names = [parse_requirement(dep)[0] for dep in manifest.get("dependencies", []) + manifest.get("devDependencies", [])]
+
+  seen = set()
+  while names:
+    name = names.pop()
+    if name in seen or name not in lock:
+      continue
+    seen.add(name)
+    names.extend(lock[name].get("dependencies", []))
+  return sorted(seen)
+
+
+def link_member_headers(root: Path, members: list[tuple[Path, dict]], lock: dict):
+  """Gives every member an extern/<name> link for each package it uses, pointing at the shared install."""
+  for path, manifest in members:
+    for name in member_packages(manifest, lock):
+      shared = root / "extern" / name
+      if not shared.exists():
+        continue
+
+      link = path / "extern" / name
+      link.parent.mkdir(exist_ok=True)
+      if link.is_symlink() or link.exists():
+        if link.is_symlink() and os.readlink(link) == os.readlink(shared):
+          continue
+        link.unlink()
+      os.symlink(os.readlink(shared), link, target_is_directory=True)
+
+
+def generate_superbuild(root: Path, name: str, members: list[tuple[Path, dict]]) -> bool:
+  """
+  Writes the workspace CMakeLists.txt that configures every member in one build tree, so each
+  dependency is added (and compiled) once. Each member sees DEPENDENCY_LIBS and MACROS narrowed to
+  the packages it uses. A hand-written CMakeLists.txt is left alone.
+  """
+  path = root / "CMakeLists.txt"
+  if path.exists() and not path.read_text().startswith(SUPERBUILD_MARKER):
+    click.echo(f"{path} was not generated by cget, leaving it unchanged.")
+    return False
+
+  lines = [
+    SUPERBUILD_MARKER,
+    "cmake_minimum_required(VERSION 3.14)",
+    f"project({name} LANGUAGES C CXX)",
+    "",
+    "include(cmake/CPM.cmake)",
+    'include("${CMAKE_SOURCE_DIR}/_dependencies.cmake")',
+    "",
+    "# Every package added for the workspace; MACROS holds the HAS_<name> of each at the same index",
+    "set(CGET_WORKSPACE_LIBS ${DEPENDENCY_LIBS})",
+    "set(CGET_WORKSPACE_MACROS ${MACROS})",
+    "macro(cget_member_dependencies)",
+    "  set(DEPENDENCY_LIBS)",
+    "  set(MACROS)",
+    "  foreach(_name ${ARGN})",
+    '    list(FIND CGET_WORKSPACE_LIBS "${_name}::${_name}" _index)',
+    "    if(_index GREATER -1)",
+    '      list(APPEND DEPENDENCY_LIBS "${_name}::${_name}")',
+    "      list(GET CGET_WORKSPACE_MACROS ${_index} _macro)",
+    '      list(APPEND MACROS "${_macro}")',
+    "    endif()",
+    "  endforeach()",
+    "endmacro()",
+    "",
+    "enable_testing()"
+  ]
+  lock = read_json(root / "cget.lock.json") or {}
+  for member, manifest in members:
+    lines += [
+      f"cget_member_dependencies({' '.join(member_packages(manifest, lock))})",
+      f"add_subdirectory({member.relative_to(root).as_posix()})"
+    ]
+  content = "\n".join(lines) + "\n"
+
+  if path.exists() and path.read_text() == content:
+    return False
+  path.write_text(content)
+  click.echo("Workspace CMakeLists.txt generated.")
+  return True
+
+
+def open_workspace(root: Path) -> tuple[list[tuple[Path, dict]], dict] | None:
+  """(members, merged manifest) if root holds a cget-workspace.json, else None."""
+  workspace = load_workspace(root)
+  if workspace is None:
+    return None
+
+  members = load_members(root, workspace)
+  return members, merge_manifests(root, workspace, members)
@@ -0,0 +1,69 @@
+import io
+import os
+import subprocess
+import tarfile
+from pathlib import Path
+import pytest
+from cget.utils.fetch import clone_checkout, extract_stream
+
+
+def git(cwd: Path, *args: str):
+  subprocess.run(["git", "-c", "user.name=cget", "-c", "user.email=cget@example.com", *args], cwd=cwd, check=True, capture_output=True)
+
+
+def make_tarball(members: list[tuple[str, str | None, bytes]]) -> io.BytesIO:
+  """A .tar.gz under a top-level directory, like a GitHub archive: (name, symlink target or None, data)."""
+  buffer = io.BytesIO()
+  with tarfile.open(fileobj=buffer, mode="w:gz") as tar:
+    for name, target, data in members:
+      info = tarfile.TarInfo(f"pkg-1.0.0/{name}")
+      if target is not None:
+        info.type = tarfile.SYMTYPE
+        info.linkname = target
+        tar.addfile(info)
+      else:
+        info.size = len(data)
+        tar.addfile(info, io.BytesIO(data))
+  buffer.seek(0)
+  return buffer
+
+
+def test_clone_keeps_symlinks_that_point_outside_the_package(tmp_path):
+  repo = tmp_path / "repo"
+  (repo / "include" / "lib").mkdir(parents=True)
+  (repo / "include" / "lib" / "lib.hpp").write_text("#pragma once\n")
+  os.symlink("/usr/include", repo / "include" / "system")
+  os.symlink("../../shared/config.h", repo / "include" / "config.h")
+  git(tmp_path, "init", "-q", str(repo))
+  git(repo, "add", "-A")
+  git(repo, "commit", "-qm", "init")
+  git(repo, "tag", "1.0.0")
+
+  dest = tmp_path / "stage" / "lib"
+  dest.parent.mkdir()
+  clone_checkout(repo.as_uri(), "1.0.0", dest, quiet=True)
+
+  assert os.readlink(dest / "include" / "system") == "/usr/include"
+  assert os.readlink(dest / "include" / "config.h") == "../../shared/config.h"
+  assert (dest / "include" / "lib" / "lib.hpp").is_file()
+  assert list(dest.parent.iterdir()) == [dest]
+
+
+@pytest.mark.skipif(not hasattr(tarfile, "data_filter"), reason="needs tarfile extraction filters")
+def test_archive_cannot_write_through_an_outside_symlink(tmp_path):
+  outside = tmp_path / "outside"
+  outside.mkdir()
+  archive = make_tarball([("escape", str(outside), b""), ("escape/evil.txt", None, b"x")])
+
+  with pytest.raises(RuntimeError, match="'escape/evil.txt'"):
+    extract_stream(archive, tmp_path / "dest")
+  assert not (outside / "evil.txt").exists()
+
+
+@pytest.mark.skipif(not hasattr(tarfile, "data_filter"), reason="needs tarfile extraction filters")
+def test_archive_member_outside_the_package_is_named(tmp_path):
+  archive = make_tarball([("../evil.txt", None, b"x")])
+
+  with pytest.raises(RuntimeError, match=r"'\.\./evil\.txt'"):
+    extract_stream(archive, tmp_path / "dest")
+  assert not (tmp_path / "evil.txt").exists()
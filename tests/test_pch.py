@@ -0,0 +1,45 @@
+import shutil
+import subprocess
+from pathlib import Path
+import pytest
+from cget.utils.pch import analyze_includes, generate_precompiled_headers
+
+
+CMAKELISTS = """cmake_minimum_required(VERSION 3.19)
+project(demo CXX)
+include(_dependencies.cmake)
+add_subdirectory(src)
+add_subdirectory(apps)
+"""
+
+
+def write(path: Path, text: str):
+  path.parent.mkdir(parents=True, exist_ok=True)
+  path.write_text(text)
+
+
+@pytest.mark.skipif(not shutil.which("cmake") or not shutil.which("c++"), reason="needs cmake and a C++ compiler")
+def test_each_target_precompiles_only_what_its_sources_include(tmp_path):
+  project = tmp_path / "demo"
+  write(project / "extern" / "liba" / "header_0.hpp", "#pragma once\n")
+  write(project / "include" / "demo" / "lib.hpp", "#pragma once\nvoid hello();\n")
+  # Same layout as the `cget init` template: the library globs src/, the app links it and the dependencies
+  write(project / "src" / "CMakeLists.txt", 'file(GLOB_RECURSE SRC "*.cpp")\nadd_library(demo_lib ${SRC})\ntarget_include_directories(demo_lib PUBLIC ${PROJECT_SOURCE_DIR}/include ${PROJECT_SOURCE_DIR}/extern)\n')
+  write(project / "apps" / "CMakeLists.txt", "add_executable(demo_app app.cpp tool.cpp)\ntarget_link_libraries(demo_app PRIVATE demo_lib)\n")
+  for name in ["lib", "util"]:
+    write(project / "src" / f"{name}.cpp", "#include <liba/header_0.hpp>\n#include <vector>\n#include <demo/lib.hpp>\n")
+  for name in ["app", "tool"]:
+    write(project / "apps" / f"{name}.cpp", "#include <string>\n#include <demo/lib.hpp>\n")
+
+  analysis = analyze_includes(project)
+  assert {entry["header"] for entry in analysis["headers"]} == {"liba/header_0.hpp", "vector", "string"}
+  write(project / "_dependencies.cmake", generate_precompiled_headers(analysis["headers"]))
+  write(project / "CMakeLists.txt", CMAKELISTS)
+
+  build = tmp_path / "build"
+  subprocess.run(["cmake", "-S", str(project), "-B", str(build)], check=True, capture_output=True)
+
+  lib = (build / "src" / "CMakeFiles" / "demo_lib.dir" / "cmake_pch.hxx").read_text()
+  app = (build / "apps" / "CMakeFiles" / "demo_app.dir" / "cmake_pch.hxx").read_text()
+  assert "<liba/header_0.hpp>" in lib and "<vector>" in lib and "<string>" not in lib
+  assert "<string>" in app and "liba" not in app and "<vector>" not in app
@@ -0,0 +1,67 @@
+import time
+import pytest
+from packaging.version import Version
+from cget.utils import resolver
+from cget.utils.resolver import ResolutionError, resolve_dependencies
+
+
+def fake_registry(monkeypatch, versions: dict[str, list[str]], manifests: dict[tuple[str, str], list[dict]]) -> list:
+  """Serves tag indexes and package manifests from memory; returns the list of manifests loaded."""
+  loaded = []
+
+  def get_version_index(source):
+    return sorted(((Version(v), f"v{v}") for v in versions[source]), reverse=True)
+
+  def load_package_manifest(source, version, fetch=None):
+    loaded.append((source, version))
+    return {"dependencies": manifests.get((source, version), [])}
+
+  monkeypatch.setattr(resolver, "get_version_index", get_version_index)
+  monkeypatch.setattr(resolver, "load_package_manifest", load_package_manifest)
+  return loaded
+
+
+def many_versions(count: int = 31) -> list[str]:
+  return [f"1.{minor}.0" for minor in range(count)]
+
+
+def test_unsatisfiable_direct_range_fails_fast(monkeypatch):
+  versions = {f"u/dep{i}": many_versions() for i in range(6)}
+  versions["u/bad"] = many_versions()
+  loaded = fake_registry(monkeypatch, versions, {})
+
+  deps = [{"source": f"u/dep{i}"} for i in range(6)] + [{"source": "u/bad", "version": ">=9"}]
+  start = time.perf_counter()
+  with pytest.raises(ResolutionError, match="no version of 'bad'"):
+    resolve_dependencies(deps)
+  assert time.perf_counter() - start < 5
+  assert loaded == []
+
+
+def test_unsatisfiable_transitive_range_backjumps(monkeypatch):
+  versions = {f"u/dep{i}": many_versions() for i in range(6)}
+  versions["u/top"] = many_versions(3)
+  versions["u/leaf"] = ["1.0.0", "2.0.0"]
+  manifests = {("u/top", v): [{"source": "u/leaf", "version": ">=9"}] for v in versions["u/top"]}
+  loaded = fake_registry(monkeypatch, versions, manifests)
+
+  deps = [{"source": f"u/dep{i}"} for i in range(6)] + [{"source": "u/top"}]
+  start = time.perf_counter()
+  with pytest.raises(ResolutionError, match="no version of 'leaf'"):
+    resolve_dependencies(deps)
+  assert time.perf_counter() - start < 5
+  # One version of each unrelated dependency, every version of top; never a second pass over them
+  assert len(loaded) == 6 + 3
+
+
+def test_backtracks_to_the_package_that_caused_the_conflict(monkeypatch):
+  versions = {"u/a": ["1.0.0", "2.0.0"], "u/b": ["1.0.0"], "u/c": ["1.0.0", "2.0.0"]}
+  manifests = {
+    ("u/a", "2.0.0"): [{"source": "u/c", "version": ">=2"}],
+    ("u/a", "1.0.0"): [{"source": "u/c", "version": "<2"}],
+    ("u/b", "1.0.0"): [{"source": "u/c", "version": "<2"}],
+  }
+  fake_registry(monkeypatch, versions, manifests)
+
+  solution = resolve_dependencies([{"source": "u/a"}, {"source": "u/b"}])
+  assert {name: node["version"] for name, node in solution.items()} == {"a": "1.0.0", "b": "1.0.0", "c": "1.0.0"}
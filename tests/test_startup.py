@@ -0,0 +1,29 @@
+import json
+import os
+import subprocess
+import sys
+from pathlib import Path
+import pytest
+
+
+ROOT = Path(__file__).resolve().parent.parent
+# Loaded only by the commands that resolve, download or bundle packages
+HEAVY_MODULES = ["packaging", "requests", "tarfile"]
+PROBE = """
+import sys
+from cget.cli import cli
+try:
+  cli(sys.argv[1:])
+except SystemExit:
+  pass
+print("imported:", *[m for m in %r if m in sys.modules], file=sys.stderr)
+""" % HEAVY_MODULES
+
+
+@pytest.mark.parametrize("args", [["list"], ["--help"], []])
+def test_light_commands_do_not_import_heavy_modules(tmp_path, args):
+  (tmp_path / "cget.json").write_text(json.dumps({"name": "p", "version": "0.1.0", "dependencies": []}))
+  env = dict(os.environ, PYTHONPATH=str(ROOT))
+  result = subprocess.run([sys.executable, "-c", PROBE, *args], cwd=tmp_path, env=env, capture_output=True, text=True, check=True)
+  imported = [line for line in result.stderr.splitlines() if line.startswith("imported:")]
+  assert imported == ["imported:"]